@@ -21,14 +21,18 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 
-from typing import List
+from typing import Iterator, List
+import math
 import subprocess
 import sys
+import time
 
 import liblocal.argsck as argsck
 import liblocal.dbck as dbck
 import liblocal.alias as alias
 import liblocal.dbops as dbops
+import liblocal.config as config
+import liblocal.tcp as tcp
 
 from liblocal.lan import *
 from liblocal.misc import *
@@ -48,7 +52,8 @@ def get_last_error() -> tuple:
     all_errors: list = [
         alias.get_last_error(),
         dbck.get_last_error(),
-        dbops.get_last_error()
+        dbops.get_last_error(),
+        config.get_last_error()
     ]
     for error in all_errors:
         if (error != (0, "")):
@@ -63,13 +68,145 @@ def __exit(exitcode, suggest_help: bool = False) -> None:
     sys.exit(exitcode)
 
 
-def __argp1(argv: list, optional: bool = False) -> None:
-    reachable_hosts: dict = get_reachable_hosts()
+def __print_timings(aliasname: str, report: list) -> None:
+    print (f"lanssh: Time taken by each resolver for \"{aliasname}\":")
+    for outcome in report:
+        print (
+            f"  {outcome['mac'].upper()}  {outcome['resolver']:<12}"
+            f"{outcome['elapsed'] * 1000:>9.1f} ms  {outcome['state']}"
+        )
+
+
+def __print_phases(aliasname: str, report: list) -> None:
+    if (report == []):
+        return
+    print (f"lanssh: Time taken for \"{aliasname}\" to come up:")
+    for phase in report:
+        print (
+            f"  {phase['mac'].upper()}  {phase['phase']:<22}"
+            f"{phase['elapsed']:>8.2f} s"
+        )
+
+
+def __wait(aliasname: str, macs: list, wait: float, deadline: float, wake: bool = False,
+    timing: bool = False) -> list:
+    # Returns what wait_for_host() found, or exits if the wait timed out or
+    # was interrupted. Running out of the deadline is left to the caller.
+    started_at: float = time.monotonic()
+    until: float = started_at + wait if wait > 0 else NO_DEADLINE
+    report: list = []
+    interfaces, subnets = alias.get_scope(aliasname)
+    if (wake):
+        sent_to: list = wake_host(macs, interfaces, subnets, config.get_setting("dhcp_leases"))
+        if (sent_to == []):
+            print(
+                f"lanssh: Error waking host (errorcode: {ERR_WAKE_FAILED}).\n"
+                "Error message:\nNo local IPv4 network with a broadcast address to send "
+                "the magic packet to."
+            )
+            __exit(1)
+        print (f"lanssh: Sent the magic packet to {', '.join(sent_to)}.")
+
+    print (
+        f"lanssh: Waiting for host {', '.join(mac.upper() for mac in macs)} a.k.a "
+        f"\"{aliasname}\" to come up" +
+        (f" (up to {wait:g} second(s))..." if wait > 0 else "..."), flush = True
+    )
+
+    found: list = []
+    try:
+        found = wait_for_host(
+            macs, interfaces = interfaces, subnets = subnets,
+            lease_files = config.get_setting("dhcp_leases"), deadline = min(deadline, until),
+            timeout = WAKE_PROBE_TIMEOUT if wake else PROBE_TIMEOUT,
+            backoff_max = WAKE_BACKOFF_MAX if wake else WAIT_BACKOFF_MAX, report = report,
+            started_at = started_at
+        )
+    except KeyboardInterrupt:
+        print ("lanssh: Waiting interrupted by user.")
+        __exit(1)
+
+    if (wake or timing):
+        __print_phases(aliasname, report)
+
+    if (found == [] and time_remaining(deadline) > 0):
+        print (
+            f"lanssh: Host {', '.join(mac.upper() for mac in macs)} a.k.a "
+            f"\"{aliasname}\" did not come up within {wait:g} second(s)."
+        )
+        __exit(1)
+    return found
+
+
+def __argp1(argv: list, modifiers: dict, optional: bool = False) -> None:
+    # The deadline covers everything from here on: reading the database,
+    # resolving the host and ssh establishing the connection
+    started_at: float = time.monotonic()
+    if (config.read_config() == {}):
+        error: tuple = get_last_error()
+        print(
+            f"lanssh: Error logging in (errorcode: {error[0]}).\n"
+            f"Error message:\n{error[1]}"
+        )
+        __exit(1, suggest_help = True)
+
     aliasname: str = argv[0]
     user: str = alias.get_default_user(aliasname) if not optional else argv[2]
+    probe_type: str = modifiers.get("P", [config.get_setting("probe")])[0].lower()
+    use_cache: bool = ("NC" not in modifiers)
+    prefer: str = config.get_setting("prefer").lower()
+    budget: float = config.get_setting("deadline")
+    if ("DL" in modifiers):
+        try:
+            budget = float(modifiers["DL"][0])
+        except ValueError:
+            budget = -1.0
+
+    if (not math.isfinite(budget) or budget < 0):
+        print(
+            f"lanssh: Error logging in (errorcode: {ERR_DEADLINE_INVALID}).\n"
+            f"Error message:\nDeadline \"{modifiers.get('DL', [budget])[0]}\" is not a "
+            "non-negative number of seconds."
+        )
+        __exit(1, suggest_help = True)
+
+    deadline: float = started_at + budget if budget > 0 else NO_DEADLINE
+
+    # -w without a number (or with 0) waits until the host comes up, and a
+    # host that is woken up is waited for WAKE_TIMEOUT seconds by default
+    wake: bool = ("AW" in modifiers or config.get_setting("auto_wake"))
+    wait: float = WAKE_TIMEOUT if wake else 0.0
+    if (modifiers.get("W", []) != []):
+        try:
+            wait = float(modifiers["W"][0])
+        except ValueError:
+            wait = -1.0
+
+    if (not math.isfinite(wait) or wait < 0):
+        print(
+            f"lanssh: Error logging in (errorcode: {ERR_WAIT_INVALID}).\n"
+            f"Error message:\nWait timeout \"{modifiers['W'][0]}\" is not a "
+            "non-negative number of seconds."
+        )
+        __exit(1, suggest_help = True)
+
+    if (probe_type not in PROBE_TYPES):
+        print(
+            f"lanssh: Error logging in (errorcode: {ERR_UNSUPPORTED_PROBE}).\n"
+            f"Error message:\nProbe type \"{probe_type}\" is currently not supported."
+        )
+        __exit(1, suggest_help = True)
+
+    if (prefer not in ADDRESS_FAMILIES):
+        print(
+            f"lanssh: Error logging in (errorcode: {ERR_CONFIG_INVALID}).\n"
+            f"Error message:\nSetting \"prefer\" in {CONFIG} must be one of: "
+            f"{', '.join(ADDRESS_FAMILIES)}."
+        )
+        __exit(1, suggest_help = True)
 
     if (user == "" and not optional):
-        error: tuple = get_last_error()
+        error = get_last_error()
         print(
             f"lanssh: Error logging in (errorcode: {error[0]}).\n"
             f"Error message:\n{error[1]}"
@@ -83,9 +220,9 @@ def __argp1(argv: list, optional: bool = False) -> None:
         )
         __exit(1, suggest_help = True)
 
-    mac: str = alias.get_mac(aliasname)
+    macs: list = alias.get_macs(aliasname)
 
-    if (mac == ""):
+    if (macs == []):
         error = get_last_error()
         print(
             f"lanssh: Error logging in (errorcode: {error[0]}).\n"
@@ -93,8 +230,67 @@ def __argp1(argv: list, optional: bool = False) -> None:
         )
         __exit(1, suggest_help = True)
 
-    if (mac in reachable_hosts.keys()):
-        ip: str = reachable_hosts[mac]
+    # An alias may name its own resolvers, overriding the setting
+    chain: list = alias.get_resolvers(aliasname)
+    if (chain == []):
+        chain = config.get_setting("resolvers")
+    for name in chain:
+        if (name not in get_resolvers()):
+            print(
+                f"lanssh: Error logging in (errorcode: {ERR_RESOLVER_UNKNOWN}).\n"
+                f"Error message:\nResolver \"{name}\" is not one of: "
+                f"{', '.join(get_resolvers())}."
+            )
+            __exit(1, suggest_help = True)
+
+    report: list = []
+    sweep: bool = ("SW" in modifiers or config.get_setting("sweep"))
+    interfaces, subnets = alias.get_scope(aliasname)
+    found: list = resolve_macs(
+        macs, probe_type = probe_type, use_cache = use_cache, sweep = sweep,
+        prefer = prefer, interfaces = interfaces, subnets = subnets,
+        deadline = deadline, chain = chain,
+        lease_files = config.get_setting("dhcp_leases"), report = report
+    )
+
+    if ("TM" in modifiers):
+        __print_timings(aliasname, report)
+
+    # Waiting (and waking, which waits) means waiting for the host to accept
+    # SSH connections, as wait_for_host() does. A lease outlives the host it
+    # was handed to and other resolvers may answer from remembered state, so
+    # what they found only spares the wait if it answers on the SSH port.
+    if (found != [] and ("W" in modifiers or wake)):
+        replies: dict = probe_ips(
+            [ip for (_, ip) in found], min(PROBE_TIMEOUT, time_remaining(deadline)), PROBE_TCP
+        )
+        found = [(mac, ip) for (mac, ip) in found if ip in replies]
+
+    if (found == [] and ("W" in modifiers or wake) and time_remaining(deadline) > 0):
+        found = __wait(aliasname, macs, wait, deadline, wake, "TM" in modifiers)
+    ips: list = [ip for (_, ip) in found]
+
+    # With several interfaces up, log in through whichever one accepts an
+    # SSH connection first, or the first one found if none does
+    ip: str = ips[0] if len(ips) == 1 else\
+        tcp.connect_first(ips, SSH_PORT, min(PROBE_TIMEOUT, time_remaining(deadline)))
+    if (ip == "" and ips != []):
+        ip = ips[0]
+
+    # ssh only takes whole seconds for ConnectTimeout
+    ssh_options: list = []
+    if (deadline != NO_DEADLINE and time_remaining(deadline) > 0):
+        ssh_options = ["-o", f"ConnectTimeout={math.ceil(time_remaining(deadline))}"]
+
+    if (deadline != NO_DEADLINE and time_remaining(deadline) == 0):
+        print (
+            f"lanssh: Gave up on host {', '.join(mac.upper() for mac in macs)} a.k.a "
+            f"\"{aliasname}\" after the deadline of {budget:g} second(s)."
+        )
+        __exit(1)
+
+    if (ip != ""):
+        mac: str = found[ips.index(ip)][0]
         print (
             f"lanssh: Connecting to host {mac.upper()} a.k.a \"{aliasname}\" at\n"
             f"{ip} as user \"{user}\"..."
@@ -102,7 +298,7 @@ def __argp1(argv: list, optional: bool = False) -> None:
 
         ssh_retcode: int = 0
         try:
-            ssh_proc = subprocess.run(["ssh", f"{user}@{ip}"])
+            ssh_proc = subprocess.run(["ssh"] + ssh_options + [f"{user}@{ip}"])
             ssh_retcode = ssh_proc.returncode
         except KeyboardInterrupt:
             print ("lanssh: Login interrupted by user.")
@@ -112,7 +308,10 @@ def __argp1(argv: list, optional: bool = False) -> None:
         __exit(int(ssh_retcode != 0))
 
     else:
-        print (f"lanssh: Host {mac.upper()} a.k.a \"{aliasname}\" is currently unreachable.")
+        print (
+            f"lanssh: Host {', '.join(mac.upper() for mac in macs)} a.k.a "
+            f"\"{aliasname}\" is currently unreachable."
+        )
         __exit(1)
 
 
@@ -186,6 +385,116 @@ def __argp7(argv: list) -> None:
     __exit(0)
 
 
+def __argp8(argv: list) -> None:
+    data: dict = dbops.read_data()
+
+    if (data == {} or config.read_config() == {}):
+        error: tuple = get_last_error()
+        print(
+            f"lanssh: Error while scanning (errorcode: {error[0]}).\n"
+            f"Error message:\n{error[1]}"
+        )
+        __exit(1, suggest_help = True)
+
+    names: dict = __aliased_macs()
+
+    spacing: str = "    "
+    print(
+        "ALIAS           " + spacing + "MAC ADDRESS      " + spacing +
+        "IP ADDRESS     " + spacing + "RTT (ms)", flush = True
+    )
+
+    # Rows are printed as the hosts answer, not once the scan is over
+    # A host reachable over both IPv4 and IPv6 gets a row for each address
+    found: set = set()
+    try:
+        hosts: Iterator = iter_reachable_hosts(
+            config.get_setting("probe"), config.get_setting("interfaces"),
+            config.get_setting("subnets")
+        )
+        for (mac, ip, rtt) in hosts:
+            if (mac not in names):
+                continue
+            print(
+                names[mac] + " " * (MAX_ALIASNAME_LENGTH - len(names[mac])) +
+                spacing + mac.upper() + spacing + ip + " " * max(0, 15 - len(ip)) +
+                spacing + f"{rtt * 1000:.1f}", flush = True
+            )
+            found.add(mac)
+    except KeyboardInterrupt:
+        print ("lanssh: Scan interrupted by user.")
+        __exit(1)
+
+    print (f"lanssh: {len(found)} of {len(names)} aliased interfaces reachable.")
+    __exit(0)
+
+
+def __aliased_macs() -> dict:
+    # Maps the MAC addresses of every alias to its name, capitalized for
+    # display. Empty if the database cannot be read.
+    return {mac: name.capitalize() for (mac, name) in alias.get_aliased_macs().items()}
+
+
+def __argp9() -> None:
+    data: dict = dbops.read_data()
+
+    if (data == {} or config.read_config() == {}):
+        error: tuple = get_last_error()
+        print(
+            f"lanssh: Error while listening (errorcode: {error[0]}).\n"
+            f"Error message:\n{error[1]}"
+        )
+        __exit(1, suggest_help = True)
+
+    print (
+        "lanssh: Listening for the aliased hosts on the local networks. Press\n"
+        "Ctrl+C to stop.", flush = True
+    )
+    try:
+        learned: Iterator = iter_learn(
+            __aliased_macs, config.get_setting("interfaces"), config.get_setting("subnets")
+        )
+        for (mac, ip) in learned:
+            print (
+                f"lanssh: Host {mac.upper()} a.k.a \"{__aliased_macs().get(mac, '')}\" "
+                f"is at {ip}.", flush = True
+            )
+    except OSError as error:
+        print(
+            f"lanssh: Error while listening (errorcode: {ERR_LISTEN_FAILED}).\n"
+            f"Error message:\nCould not open a packet socket: {error.strerror}.\n"
+            "Listening needs the CAP_NET_RAW capability (e.g. running as root)."
+        )
+        __exit(1)
+    except KeyboardInterrupt:
+        print ("lanssh: Stopped listening.")
+        __exit(0)
+
+
+def __argp10(argv: list) -> None:
+    aliasname: str = argv[1]
+    if (config.read_config() == {}):
+        error: tuple = get_last_error()
+        print(
+            f"lanssh: Error waking host (errorcode: {error[0]}).\n"
+            f"Error message:\n{error[1]}"
+        )
+        __exit(1, suggest_help = True)
+
+    macs: list = alias.get_macs(aliasname)
+    if (macs == []):
+        error = get_last_error()
+        print(
+            f"lanssh: Error waking host (errorcode: {error[0]}).\n"
+            f"Error message:\n{error[1]}"
+        )
+        __exit(1, suggest_help = True)
+
+    found: list = __wait(aliasname, macs, WAKE_TIMEOUT, NO_DEADLINE, wake = True)
+    print (f"lanssh: Host {found[0][0].upper()} a.k.a \"{aliasname}\" is up at {found[0][1]}.")
+    __exit(0)
+
+
 def __arg_invalid_noargv() -> None:
     print("lanssh: Invalid arguments or combination of arguments.")
     __exit(1, suggest_help = True)
@@ -207,7 +516,7 @@ def __dependency_missing() -> None:
 
 
 def main() -> None:
-    argv: list = sys.argv[1:]
+    argv, modifiers = argsck.split_login_modifiers(sys.argv[1:])
     argcode: int = argsck.check_valid_args_pattern()
 
     if (argcode == -1):
@@ -232,10 +541,10 @@ def main() -> None:
     mkdb()
 
     if (argcode == ARGS_PATTERN_1):
-        return __argp1(argv)
+        return __argp1(argv, modifiers)
 
     if (argcode == ARGS_PATTERN_1_OPTIONAL):
-        return __argp1(argv, optional = True)
+        return __argp1(argv, modifiers, optional = True)
 
     if (argcode == ARGS_PATTERN_2):
         return __argp2(argv)
@@ -252,6 +561,15 @@ def main() -> None:
     if (argcode == ARGS_PATTERN_7):
         return __argp7(argv)
 
+    if (argcode == ARGS_PATTERN_8):
+        return __argp8(argv)
+
+    if (argcode == ARGS_PATTERN_9):
+        return __argp9()
+
+    if (argcode == ARGS_PATTERN_10):
+        return __argp10(argv)
+
 if (__name__ == "__main__"):
     main()
 
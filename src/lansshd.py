@@ -0,0 +1,414 @@
+#!/usr/bin/python3
+
+# File: ./lansshd.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Iterator
+import asyncio
+import functools
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import time
+
+import liblocal.alias as alias
+import liblocal.config as config
+import liblocal.daemon as daemon
+import liblocal.dns as dns
+import liblocal.netlink as netlink
+
+from liblocal.lan import *
+from liblocal.misc import *
+from liblocal.const import *
+
+# The hosts lansshd knows about: mac -> {ip: (confirmed_at, probe_type)},
+# confirmed_at being time.monotonic()
+__hosts: dict = {}
+__hosts_lock: threading.Lock = threading.Lock()
+# MAC -> alias name, and MAC -> (interfaces, subnets) the host is looked for
+# on, both re-read on every refresh
+__aliased: dict = {}
+__scopes: dict = {}
+# MAC -> (future, started_at) of the resolution in progress for the DNS
+# responder, and the replies being worked on; both only touched from the
+# responder's event loop
+__dns_resolving: dict = {}
+__dns_tasks: set = set()
+
+
+def __log(message: str) -> None:
+    print (f"lansshd: {message}", file = sys.stderr, flush = True)
+
+
+def __scope(mac: str) -> tuple:
+    return __scopes.get(mac, (config.get_setting("interfaces"), config.get_setting("subnets")))
+
+
+def __confirm(mac: str, ip: str, probe_type: str) -> None:
+    # An alias with interfaces or subnets of its own is only known within them
+    if (not ip_in_scope(ip, *__scope(mac))):
+        return
+    with __hosts_lock:
+        __hosts.setdefault(mac, {})[ip] = (time.monotonic(), probe_type)
+
+
+def __forget(mac: str, ip: str) -> None:
+    with __hosts_lock:
+        __hosts.get(mac, {}).pop(ip, None)
+
+
+def __forget_stale() -> None:
+    now: float = time.monotonic()
+    with __hosts_lock:
+        for (mac, ips) in list(__hosts.items()):
+            for (ip, (confirmed_at, _)) in list(ips.items()):
+                if (now - confirmed_at >= DAEMON_FRESH_TIME):
+                    ips.pop(ip)
+            if (ips == {}):
+                __hosts.pop(mac)
+
+
+def __refresh(probe_type: str) -> None:
+    global __aliased, __scopes
+    __aliased = alias.get_aliased_macs()
+    __scopes = {mac: alias.get_scope(name) for (mac, name) in __aliased.items()}
+    neighbors: list = []
+    for mac in __aliased:
+        neighbors += get_neighbors(*__scope(mac), mac)
+    owners: dict = {ip: mac for (ip, mac, _) in neighbors}
+    for (ip, _) in iter_check_neighbors(neighbors, probe_type, PROBE_TIMEOUT):
+        __confirm(owners[ip], ip, probe_type)
+
+
+def __refresh_forever() -> None:
+    # Re-checks the neighbor entries of the aliased hosts, and only those,
+    # every DAEMON_REFRESH_INTERVAL seconds. A refresh that fails is logged
+    # and tried again at the next one, rather than ending the thread.
+    probe_type: str = config.get_setting("probe")
+    while (True):
+        started_at: float = time.monotonic()
+        try:
+            __refresh(probe_type)
+        except Exception as error:
+            __log(f"Refreshing the hosts failed ({type(error).__name__}: {error}).")
+
+        __forget_stale()
+        time.sleep(max(0.0, DAEMON_REFRESH_INTERVAL - (time.monotonic() - started_at)))
+
+
+def __on_neighbor_change(kind: str, ip: str, mac: str, state: int) -> None:
+    # The kernel has just confirmed or given up on an aliased host, which
+    # takes effect before the next refresh
+    if (mac not in __aliased):
+        return
+    if (kind == NEIGHBOR_DELETED or state & (netlink.NUD_FAILED | netlink.NUD_INCOMPLETE)):
+        __forget(mac, ip)
+    elif (state & netlink.NUD_REACHABLE and
+        ip in [neighbor[0] for neighbor in get_neighbors(*__scope(mac), mac)]):
+        __confirm(mac, ip, PROBE_PASSIVE)
+
+
+def __learn_forever() -> None:
+    try:
+        learned: Iterator = iter_learn(
+            alias.get_aliased_macs, config.get_setting("interfaces"),
+            config.get_setting("subnets")
+        )
+        for (mac, ip) in learned:
+            __confirm(mac, ip, PROBE_PASSIVE)
+    except OSError as error:
+        __log(
+            f"Not listening for ARP and neighbor advertisements ({error.strerror}), "
+            "hosts are only found by probing."
+        )
+
+
+def __family_of(ip: str) -> str:
+    return FAMILY_IPV6 if ":" in ip else FAMILY_IPV4
+
+
+def __answer(request: dict) -> dict:
+    # An address confirmed by any probe (or heard passively) shows the host
+    # is up, which is all the link probe types ask for. The tcp and ssh
+    # probes ask for more, so only an address they confirmed will do.
+    mac: str = str(request.get("mac", "")).lower()
+    probe_type: str = str(request.get("probe", PROBE_ICMP))
+    prefer: str = str(request.get("prefer", FAMILY_IPV4))
+    now: float = time.monotonic()
+
+    with __hosts_lock:
+        ips: dict = dict(__hosts.get(mac, {}))
+    ranked: list = sorted(
+        (__family_of(ip) != prefer, now - confirmed_at, ip)
+        for (ip, (confirmed_at, confirmed_by)) in ips.items()
+        if (now - confirmed_at < DAEMON_FRESH_TIME and
+            (probe_type in LINK_PROBE_TYPES or confirmed_by == probe_type))
+    )
+    return {"ip": ranked[0][2] if ranked != [] else ""}
+
+
+def __dns_macs(name: str) -> list:
+    # The MACs of the alias "<alias>.<dns_domain>" names
+    suffix: str = "." + config.get_setting("dns_domain").lower().strip(".")
+    if (not name.endswith(suffix)):
+        return []
+    aliasname: str = name[:-len(suffix)]
+    return [mac for (mac, owner) in __aliased.items() if owner.lower() == aliasname]
+
+
+def __dns_addresses(macs: list, qtype: int) -> tuple:
+    # Returns (ips, known): the fresh addresses of the host in the family
+    # asked for, and whether it has any fresh address at all. Link-local
+    # IPv6 addresses are left out, as DNS cannot carry their interface.
+    families: tuple = {
+        dns.TYPE_A: (FAMILY_IPV4,), dns.TYPE_AAAA: (FAMILY_IPV6,)
+    }.get(qtype, ADDRESS_FAMILIES)
+    now: float = time.monotonic()
+    fresh: list = []
+    with __hosts_lock:
+        for mac in macs:
+            fresh += [
+                (now - confirmed_at, ip) for (ip, (confirmed_at, _)) in
+                __hosts.get(mac, {}).items() if (now - confirmed_at < DAEMON_FRESH_TIME)
+            ]
+    ips: list = [
+        ip for (_, ip) in sorted(fresh) if "%" not in ip and __family_of(ip) in families
+    ]
+    return (ips, fresh != [])
+
+
+def __dns_resolve(mac: str) -> None:
+    # Looks for a host lansshd does not know yet, as lanssh would, without
+    # asking lansshd itself, and gives up after DNS_RESOLVE_DEADLINE seconds
+    probe_type: str = config.get_setting("probe")
+    interfaces, subnets = __scope(mac)
+    ip: str = resolve_mac(
+        mac, probe_type = probe_type, prefer = config.get_setting("prefer"),
+        interfaces = interfaces, subnets = subnets,
+        chain = [name for name in config.get_setting("resolvers") if name != RESOLVER_DAEMON],
+        lease_files = config.get_setting("dhcp_leases"),
+        deadline = time.monotonic() + DNS_RESOLVE_DEADLINE
+    )
+    if (ip != ""):
+        __confirm(mac, ip, probe_type)
+
+
+def __dns_resolved(mac: str, future: asyncio.Future) -> None:
+    # Only the resolution that is still the current one for mac is dropped
+    if (__dns_resolving.get(mac, (None, 0.0))[0] is future):
+        __dns_resolving.pop(mac)
+
+
+def __dns_respond(query: tuple) -> tuple:
+    # Returns (rcode, ips, macs_to_resolve). Names lansshd is not
+    # authoritative for are refused, since it does not recurse.
+    if ((query[1] & dns.OPCODE_MASK) >> 11 != dns.OPCODE_QUERY):
+        return (dns.RCODE_NOTIMP, [], [])
+    if (query[5] == b""):
+        return (dns.RCODE_FORMERR, [], [])
+    if (query[4] not in (dns.CLASS_IN, dns.CLASS_ANY)):
+        return (dns.RCODE_REFUSED, [], [])
+
+    macs: list = __dns_macs(query[2])
+    if (macs == []):
+        suffix: str = config.get_setting("dns_domain").lower().strip(".")
+        in_domain: bool = (query[2] == suffix or query[2].endswith("." + suffix))
+        return (dns.RCODE_NXDOMAIN if in_domain else dns.RCODE_REFUSED, [], [])
+    if (query[3] not in (dns.TYPE_A, dns.TYPE_AAAA, dns.TYPE_ANY)):
+        return (dns.RCODE_NOERROR, [], [])
+
+    # A host known in the other family only gets an empty answer
+    ips, known = __dns_addresses(macs, query[3])
+    return (dns.RCODE_NOERROR, ips, [] if known else macs)
+
+
+async def __dns_answer(query: tuple, max_size: int) -> bytes:
+    # Known hosts are answered at once. For others, the resolution runs in
+    # the background (once per MAC however many clients ask), and the answer
+    # waits for it for up to DNS_RESOLVE_TIMEOUT seconds. A resolution still
+    # running past its deadline is given up on and started again.
+    rcode, ips, unknown = __dns_respond(query)
+    if (unknown != []):
+        loop = asyncio.get_running_loop()
+        now: float = time.monotonic()
+        for mac in unknown:
+            if (now - __dns_resolving.get(mac, (None, -math.inf))[1] >= DNS_RESOLVE_DEADLINE):
+                future: asyncio.Future = loop.run_in_executor(None, __dns_resolve, mac)
+                future.add_done_callback(functools.partial(__dns_resolved, mac))
+                __dns_resolving[mac] = (future, now)
+        await asyncio.wait(
+            [__dns_resolving[mac][0] for mac in unknown if mac in __dns_resolving],
+            timeout = DNS_RESOLVE_TIMEOUT
+        )
+        ips = __dns_addresses(unknown, query[3])[0]
+    return dns.build_response(query, rcode, ips, DNS_TTL, max_size)
+
+
+async def __dns_reply_udp(sock: socket.socket, query: tuple, client: tuple) -> None:
+    try:
+        sock.sendto(await __dns_answer(query, dns.MAX_UDP_SIZE), client)
+    except OSError:
+        pass
+
+
+def __on_dns_datagram(sock: socket.socket) -> None:
+    try:
+        data, client = sock.recvfrom(DNS_MAX_MESSAGE)
+    except OSError:
+        return
+    query: tuple = dns.parse_query(data)
+    if (query == ()):
+        return
+
+    # Most queries are for hosts lansshd knows, and need no task
+    rcode, ips, unknown = __dns_respond(query)
+    if (unknown == []):
+        try:
+            sock.sendto(dns.build_response(query, rcode, ips, DNS_TTL, dns.MAX_UDP_SIZE), client)
+        except OSError:
+            pass
+        return
+    task: asyncio.Task = asyncio.ensure_future(__dns_reply_udp(sock, query, client))
+    __dns_tasks.add(task)
+    task.add_done_callback(__dns_tasks.discard)
+
+
+async def __serve_dns_client(reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter) -> None:
+    # Over TCP, each message is preceded by its length (RFC 1035 4.2.2)
+    try:
+        while (True):
+            length: bytes = await asyncio.wait_for(reader.readexactly(2), DAEMON_CLIENT_TIMEOUT)
+            data: bytes = await asyncio.wait_for(
+                reader.readexactly(int.from_bytes(length, "big")), DAEMON_CLIENT_TIMEOUT
+            )
+            query: tuple = dns.parse_query(data)
+            if (query == ()):
+                break
+            response: bytes = await __dns_answer(query, 0)
+            writer.write(len(response).to_bytes(2, "big") + response)
+            await writer.drain()
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.close()
+
+
+async def __serve_dns(port: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind((DNS_ADDRESS, port))
+        server: asyncio.AbstractServer = await asyncio.start_server(
+            __serve_dns_client, DNS_ADDRESS, port, reuse_address = True
+        )
+    except OSError as error:
+        sock.close()
+        __log(f"Not answering DNS queries on {DNS_ADDRESS}:{port} ({error.strerror}).")
+        return
+
+    sock.setblocking(False)
+    asyncio.get_running_loop().add_reader(sock.fileno(), __on_dns_datagram, sock)
+    __log(
+        f"Answering DNS queries for *.{config.get_setting('dns_domain').strip('.')} on "
+        f"{DNS_ADDRESS}:{port}."
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def __serve_dns_forever(port: int) -> None:
+    asyncio.run(__serve_dns(port))
+
+
+def __serve_client(conn: socket.socket) -> None:
+    conn.settimeout(DAEMON_CLIENT_TIMEOUT)
+    try:
+        with conn, conn.makefile("rwb") as stream:
+            while (True):
+                line: bytes = stream.readline(DAEMON_MAX_LINE)
+                if (line == b""):
+                    break
+                request: object = json.loads(line)
+                if (type(request) != dict):
+                    break
+                stream.write(json.dumps(__answer(request)).encode() + b"\n")
+                stream.flush()
+    except (OSError, ValueError):
+        pass
+
+
+def main() -> None:
+    if (not platform_supported()):
+        __log("Unsupported platform.")
+        sys.exit(1)
+
+    if (config.read_config() == {}):
+        error: tuple = config.get_last_error()
+        __log(f"Error reading settings (errorcode: {error[0]}).\n{error[1]}")
+        sys.exit(1)
+
+    try:
+        listener, activated = daemon.open_listener()
+    except OSError as error:
+        __log(f"Could not listen on {DAEMON_SOCKET_EXPAND}: {error.strerror}.")
+        sys.exit(1)
+
+    # Without netlink, the refresher reads the whole neighbor table each time
+    try:
+        watch_neighbors(__on_neighbor_change)
+    except OSError as error:
+        __log(f"Not watching the neighbor table ({error.strerror}).")
+
+    for task in (__refresh_forever, __learn_forever):
+        threading.Thread(target = task, daemon = True).start()
+
+    dns_port: int = config.get_setting("dns_port")
+    if (dns_port > 65535):
+        __log(f"Setting \"dns_port\" in {CONFIG} is not a port number.")
+        sys.exit(1)
+    if (dns_port > 0):
+        threading.Thread(target = __serve_dns_forever, args = (dns_port,), daemon = True).start()
+
+    # Started on demand by systemd, lansshd exits once nobody has asked for
+    # DAEMON_IDLE_TIMEOUT seconds, and systemd starts it again when needed.
+    # DNS clients do not go through systemd, so lansshd keeps running for them.
+    listener.settimeout(DAEMON_IDLE_TIMEOUT if activated and dns_port == 0 else None)
+    __log(f"Serving lookups on {listener.getsockname()}.")
+    try:
+        while (True):
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                __log("Exiting after being idle.")
+                break
+            threading.Thread(target = __serve_client, args = (conn,), daemon = True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        if (not activated and os.path.exists(DAEMON_SOCKET_EXPAND)):
+            os.unlink(DAEMON_SOCKET_EXPAND)
+
+if (__name__ == "__main__"):
+    main()
@@ -21,6 +21,7 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 
+from . import config
 from . import dbops
 from .errno import *
 from .const import *
@@ -41,10 +42,11 @@ def __validate_data(db_data: dict, name: str, mac: str, default_user: str) -> in
         errno = ERR_ALIASNAME_TOO_LONG
         return -1
 
-    if (MAC_PATTERN.fullmatch(mac) is None):
-        errdesc = f"Invalid MAC address received: \"{mac}\"."
-        errno = ERR_MAC_INVALID
-        return -1
+    for single_mac in mac.split(MAC_SEPARATOR):
+        if (MAC_PATTERN.fullmatch(single_mac) is None):
+            errdesc = f"Invalid MAC address received: \"{single_mac}\"."
+            errno = ERR_MAC_INVALID
+            return -1
 
     if (default_user == ""):
         errdesc = f"Username cannot be empty."
@@ -75,10 +77,13 @@ def add_alias(name: str, mac: str, default_user: str) -> int:
     if (__validate_data(data, name, mac, default_user) != 0):
         return -1
 
+    # Several MACs (one per network interface of the host) are stored as a
+    # list, in the order given. A single MAC is stored as a plain string.
+    macs: list = mac.lower().split(MAC_SEPARATOR)
     data["aliases"].append(
         {
             "name" : name.lower(),
-            "mac" : mac.lower(),
+            "mac" : macs if len(macs) > 1 else macs[0],
             "default_user": default_user
         }
     )
@@ -138,29 +143,107 @@ def get_default_user(aliasname: str) -> list:
     return default_user
 
 
-def get_mac(aliasname: str) -> str:
+def get_macs(aliasname: str) -> list:
     '''
-    Returns the host MAC address for the given alias name.
+    Returns all host MAC addresses for the given alias name, in the order
+    they were stored.
     '''
     global errdesc, errno
     data: dict = dbops.read_data()
-    mac: str = ""
+    macs: list = []
 
     if (data == {}):
         errno, errdesc = dbops.get_last_error()
-        return ""
+        return []
 
     aliases: list = data["aliases"]
     for alias in aliases:
         if (alias["name"].lower() == aliasname.lower()):
-            mac = alias["mac"]
+            macs = alias["mac"] if type(alias["mac"]) == list else [alias["mac"]]
             break
 
-    if (mac == ""):
+    if (macs == []):
         errdesc = f"Alias \"{aliasname}\" does not exist in database."
         errno = ERR_ALIAS_NOT_FOUND
 
-    return mac.lower()
+    return [mac.lower() for mac in macs]
+
+
+def get_mac(aliasname: str) -> str:
+    '''
+    Returns the first host MAC address for the given alias name.
+    '''
+    macs: list = get_macs(aliasname)
+    return macs[0] if macs != [] else ""
+
+
+def get_aliased_macs() -> dict:
+    '''
+    Returns a dictionary mapping the MAC addresses of every alias to the
+    alias name. Returns an empty dictionary if the database cannot be read,
+    without reporting an error, since callers poll it.
+    '''
+    data: dict = {}
+    try:
+        data = dbops.read_data()
+    except OSError:
+        pass
+    dbops.get_last_error()
+
+    names: dict = {}
+    for alias in data.get("aliases", []):
+        for mac in (alias["mac"] if type(alias["mac"]) == list else [alias["mac"]]):
+            names[mac.lower()] = alias["name"]
+    return names
+
+
+def __get_optional(aliasname: str, key: str) -> list:
+    data: dict = dbops.read_data()
+    for alias in data.get("aliases", []):
+        if (alias["name"].lower() == aliasname.lower()):
+            return list(alias.get(key, []))
+    return []
+
+
+def get_resolvers(aliasname: str) -> list:
+    '''
+    Returns the resolvers chosen for the given alias name in the optional
+    "resolvers" key of its entry, or an empty list if it has none, in which
+    case the "resolvers" setting applies.
+    '''
+    return __get_optional(aliasname, "resolvers")
+
+
+def get_interfaces(aliasname: str) -> list:
+    '''
+    Returns the network interfaces the given alias is looked for on, from
+    the optional "interfaces" key of its entry, or an empty list if it has
+    none, in which case the "interfaces" setting applies.
+    '''
+    return __get_optional(aliasname, "interfaces")
+
+
+def get_subnets(aliasname: str) -> list:
+    '''
+    Returns the networks the given alias is looked for in, from the
+    optional "subnets" key of its entry, or an empty list if it has none,
+    in which case the "subnets" setting applies.
+    '''
+    return __get_optional(aliasname, "subnets")
+
+
+def get_scope(aliasname: str) -> tuple:
+    '''
+    Returns the (interfaces, subnets) tuple the given alias is looked for
+    on: the "interfaces" and "subnets" of its entry, each falling back to
+    the setting of the same name if the entry does not have it.
+    '''
+    interfaces: list = get_interfaces(aliasname)
+    subnets: list = get_subnets(aliasname)
+    return (
+        interfaces if interfaces != [] else config.get_setting("interfaces"),
+        subnets if subnets != [] else config.get_setting("subnets")
+    )
 
 
 def get_last_error() -> tuple:
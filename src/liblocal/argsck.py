@@ -26,9 +26,62 @@ import sys
 from .const import *
 
 
+def __is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def split_login_modifiers(argv: list) -> tuple:
+    '''
+    Separates the options listed in LOGIN_MODIFIERS from argv. Returns a
+    tuple (remaining_argv, modifiers) where modifiers maps the key of each
+    option in VALID_OPTIONS to the list of values that followed it. Returns
+    (argv, None) if a modifier is repeated or is missing its values. The
+    modifiers in OPTIONAL_VALUE_MODIFIERS map to an empty list when no
+    number follows them.
+    '''
+    remaining: list = []
+    modifiers: dict = {}
+    i: int = 0
+
+    while (i < len(argv)):
+        key: str = ""
+        for option_key in LOGIN_MODIFIERS:
+            if (argv[i] in VALID_OPTIONS[option_key]):
+                key = option_key
+                break
+
+        if (key == ""):
+            remaining.append(argv[i])
+            i += 1
+            continue
+
+        nvalues: int = LOGIN_MODIFIERS[key]
+        values: list = argv[i + 1:i + 1 + nvalues]
+        if (key in OPTIONAL_VALUE_MODIFIERS and
+            (values == [] or not __is_number(values[0]))):
+            nvalues = 0
+            values = []
+        if (key in modifiers or len(values) != nvalues or
+            True in [value.startswith("-") for value in values]):
+            return (argv, None)
+
+        modifiers[key] = values
+        i += 1 + nvalues
+
+    return (remaining, modifiers)
+
+
 def check_valid_args_pattern() -> int:
-    argv: list = sys.argv[1:]
+    argv, modifiers = split_login_modifiers(sys.argv[1:])
     argc: int = len(argv)
+
+    if (modifiers is None):
+        return -1
+
     all_options = []
     _ = [
         (
@@ -41,9 +94,12 @@ def check_valid_args_pattern() -> int:
             arg not in all_options):
             return -1
 
-    if (argc == 0):
+    if (argc == 0 and modifiers == {}):
         return NO_ARGS_SPECIFIED
 
+    if (modifiers != {} and (argc == 0 or argv[0] in all_options)):
+        return -1
+
     if (argc == 1 and argv[0] not in all_options):
         return ARGS_PATTERN_1
 
@@ -72,5 +128,14 @@ def check_valid_args_pattern() -> int:
     if (argc == 1 and argv[0] in VALID_OPTIONS["RD"]):
         return ARGS_PATTERN_7
 
+    if (argc == 1 and argv[0] in VALID_OPTIONS["SC"]):
+        return ARGS_PATTERN_8
+
+    if (argc == 1 and argv[0] in VALID_OPTIONS["LS"]):
+        return ARGS_PATTERN_9
+
+    if (argc == 2 and argv[0] in VALID_OPTIONS["WK"]):
+        return ARGS_PATTERN_10
+
     return -1
 
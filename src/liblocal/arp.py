@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/arp.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Iterator
+import selectors
+import socket
+import struct
+import time
+
+ETH_P_ARP = 0x0806
+ETH_P_IP = 0x0800
+ARPHRD_ETHER = 1
+ARPOP_REQUEST = 1
+ARPOP_REPLY = 2
+
+ETH_HEADER_FORMAT = "!6s6sH"
+ARP_PACKET_FORMAT = "!HHBBH6s4s6s4s"
+ETH_HEADER_SIZE = struct.calcsize(ETH_HEADER_FORMAT)
+ARP_PACKET_SIZE = struct.calcsize(ARP_PACKET_FORMAT)
+ETH_MIN_FRAME_SIZE = 60
+BROADCAST_MAC = b"\xff" * 6
+
+RECV_BUFSIZE = 2048
+
+
+def __mac_to_bytes(mac: str) -> bytes:
+    return bytes.fromhex(mac.replace(":", ""))
+
+
+def open_socket(ifname: str) -> tuple:
+    '''
+    Opens an AF_PACKET socket bound to the ARP protocol on interface ifname.
+    Returns a (socket, interface_mac) tuple, interface_mac being raw bytes,
+    or empty if ifname is not an Ethernet interface (e.g. a tun, WireGuard
+    or other point-to-point link), which cannot carry the frames built
+    here. Raises OSError if the user lacks CAP_NET_RAW or the interface is
+    unusable.
+    '''
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+    try:
+        sock.bind((ifname, ETH_P_ARP))
+    except OSError:
+        sock.close()
+        raise
+    _, _, _, hatype, address = sock.getsockname()
+    return (sock, address if hatype == ARPHRD_ETHER and len(address) == 6 else b"")
+
+
+def pack_request(source_mac: bytes, source_ip: str, target_ip: str) -> bytes:
+    '''
+    Returns a broadcast Ethernet frame carrying an ARP who-has request for
+    target_ip, padded to the minimum Ethernet frame size.
+    '''
+    frame: bytes = struct.pack(ETH_HEADER_FORMAT, BROADCAST_MAC, source_mac, ETH_P_ARP)
+    frame += struct.pack(
+        ARP_PACKET_FORMAT, ARPHRD_ETHER, ETH_P_IP, 6, 4, ARPOP_REQUEST,
+        source_mac, socket.inet_aton(source_ip), b"\0" * 6, socket.inet_aton(target_ip)
+    )
+    return frame + b"\0" * (ETH_MIN_FRAME_SIZE - len(frame))
+
+
+def parse_reply(frame: bytes) -> tuple:
+    '''
+    Returns the (sender_ip, sender_mac) pair of an ARP reply frame, or an
+    empty tuple if frame is not one. sender_mac is lowercase.
+    '''
+    if (len(frame) < ETH_HEADER_SIZE + ARP_PACKET_SIZE):
+        return ()
+
+    htype, ptype, hlen, plen, oper, sha, spa, _, _ = struct.unpack_from(
+        ARP_PACKET_FORMAT, frame, ETH_HEADER_SIZE
+    )
+    if ((htype, ptype, hlen, plen, oper) != (ARPHRD_ETHER, ETH_P_IP, 6, 4, ARPOP_REPLY)):
+        return ()
+
+    return (socket.inet_ntoa(spa), ":".join(f"{byte:02x}" for byte in sha))
+
+
+def iter_probe(targets: list, timeout: float, unsent: list = None) -> Iterator[tuple]:
+    '''
+    Sends an ARP who-has request for every (ip, expected_mac, ifname,
+    source_ip) tuple in targets, using one socket per interface and a single
+    receive loop, and waits up to timeout seconds for the replies. Yields an
+    (ip, rtt) tuple as soon as a reply for ip comes from expected_mac, rtt
+    being in seconds. Replies from any other MAC are ignored, so an address
+    that now belongs to a different device never counts as reachable.
+    The IPs that no request could be sent for, because their interface is
+    not Ethernet or sending failed, are appended to unsent, if given, so
+    the caller can check them some other way. Closing the generator early
+    closes the sockets. Raises OSError if an AF_PACKET socket cannot be
+    opened.
+    '''
+    # ifname -> {ip: (expected_mac, sent_at)}
+    pending: dict = {}
+    sockets: dict = {}
+
+    try:
+        for (ip, expected_mac, ifname, source_ip) in targets:
+            if (ifname not in sockets):
+                sockets[ifname] = open_socket(ifname)
+                pending[ifname] = {}
+            sock, source_mac = sockets[ifname]
+            sent: bool = False
+            if (source_mac != b""):
+                try:
+                    sock.send(pack_request(source_mac, source_ip, ip))
+                    sent = True
+                except OSError:
+                    pass
+            if (sent):
+                pending[ifname][ip] = (expected_mac.lower(), time.monotonic())
+            elif (unsent is not None):
+                unsent.append(ip)
+
+        deadline: float = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            for (ifname, (sock, _)) in sockets.items():
+                selector.register(sock, selectors.EVENT_READ, ifname)
+
+            while (True in [entries != {} for entries in pending.values()]):
+                remaining: float = deadline - time.monotonic()
+                if (remaining <= 0):
+                    break
+
+                for (key, _) in selector.select(remaining):
+                    try:
+                        frame: bytes = key.fileobj.recv(RECV_BUFSIZE)
+                    except OSError:
+                        continue
+
+                    reply: tuple = parse_reply(frame)
+                    entries: dict = pending[key.data]
+                    if (reply == () or reply[0] not in entries):
+                        continue
+
+                    expected_mac, sent_at = entries[reply[0]]
+                    if (reply[1] == expected_mac):
+                        entries.pop(reply[0])
+                        yield (reply[0], time.monotonic() - sent_at)
+    finally:
+        for (sock, _) in sockets.values():
+            sock.close()
+
+
+def probe(targets: list, timeout: float, unsent: list = None) -> dict:
+    '''
+    Like iter_probe(), but waits for all replies and returns a dictionary
+    mapping each IP whose reply came from its expected MAC to its round-trip
+    time in seconds.
+    '''
+    return dict(iter_probe(targets, timeout, unsent))
@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/cache.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import fcntl
+import json
+import os
+import time
+
+from . import config
+from . import sockutil
+from .const import *
+
+
+def __read_hosts() -> dict:
+    try:
+        with open(CACHE_EXPAND) as cache_file:
+            data = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+    if (type(data) != dict or type(data.get("hosts")) != dict):
+        return {}
+    return data["hosts"]
+
+
+def __write_hosts(hosts: dict) -> None:
+    # Written to a temporary file and renamed over the cache, so readers never
+    # see a partially written file.
+    temp_path: str = f"{CACHE_EXPAND}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as cache_file:
+        cache_file.write(json.dumps({"hosts": hosts}, indent=4) + "\n")
+    os.replace(temp_path, CACHE_EXPAND)
+
+
+def __entry_valid(entry: object) -> bool:
+    return (
+        type(entry) == dict and
+        type(entry.get("ip")) == str and sockutil.valid_ip(entry["ip"]) and
+        type(entry.get("seen")) in (int, float) and
+        type(entry.get("reachable")) == bool and
+        type(entry.get("probe")) == str and
+        type(entry.get("rtt", {})) == dict
+    )
+
+
+def __rtt_valid(stats: object) -> bool:
+    return (
+        type(stats) == list and len(stats) == 2 and
+        False not in [type(value) in (int, float) and value >= 0 for value in stats]
+    )
+
+
+def __update_rtt(stats: list, rtt: float) -> list:
+    # Smoothed round-trip time and its mean deviation, as TCP keeps them for
+    # its retransmission timer (RFC 6298)
+    if (not __rtt_valid(stats)):
+        return [rtt, rtt / 2]
+    srtt, rttvar = stats
+    rttvar = (1 - RTT_BETA) * rttvar + RTT_BETA * abs(srtt - rtt)
+    srtt = (1 - RTT_ALPHA) * srtt + RTT_ALPHA * rtt
+    return [srtt, rttvar]
+
+
+def probe_timeout(mac: str, probe_type: str) -> float:
+    f'''
+    Returns how long to wait for the host with the given MAC address to
+    answer a probe of probe_type, derived from the round-trip times recorded
+    for it in {CACHE} the way TCP derives its retransmission timeout:
+    the smoothed round-trip time plus RTT_K times its mean deviation, kept
+    between ADAPTIVE_TIMEOUT_MIN and ADAPTIVE_TIMEOUT_MAX. Hosts without
+    recorded round-trip times get PROBE_TIMEOUT.
+    '''
+    entry: object = __read_hosts().get(mac.lower(), {})
+    stats: object = entry.get("rtt", {}).get(probe_type) if __entry_valid(entry) else None
+    if (not __rtt_valid(stats)):
+        return PROBE_TIMEOUT
+
+    srtt, rttvar = stats
+    return min(ADAPTIVE_TIMEOUT_MAX, max(ADAPTIVE_TIMEOUT_MIN, srtt + RTT_K * rttvar))
+
+
+def lookup(mac: str) -> dict:
+    f'''
+    Returns the entry for mac from {CACHE} if it has not expired, or an empty
+    dictionary otherwise. An entry is a dictionary with the keys "ip" (last
+    IP the host was seen at), "seen" (UNIX time of the last check),
+    "reachable" (result of the last check), "probe" (the probe type used
+    for it) and, once round-trip times were measured, "rtt" (a dictionary
+    mapping probe types to the [smoothed RTT, RTT deviation] pair, in
+    seconds). Entries for reachable hosts expire after the "cache_ttl"
+    setting, the others after "cache_negative_ttl".
+    '''
+    entry: object = __read_hosts().get(mac.lower(), {})
+    if (not __entry_valid(entry)):
+        return {}
+
+    ttl: float = config.get_setting(
+        "cache_ttl" if entry["reachable"] else "cache_negative_ttl"
+    )
+    age: float = time.time() - entry["seen"]
+    if (age < 0 or age >= ttl):
+        return {}
+
+    return entry
+
+
+def last_ip(mac: str) -> str:
+    f'''
+    Returns the last IP the host with the given MAC address was seen at
+    according to {CACHE}, however long ago, or an empty string.
+    '''
+    entry: object = __read_hosts().get(mac.lower(), {})
+    return entry["ip"] if __entry_valid(entry) else ""
+
+
+def record(mac: str, ip: str, reachable: bool, probe_type: str, rtt: float = 0.0) -> None:
+    f'''
+    Stores the result of checking the host with the given MAC address in
+    {CACHE}. If ip is empty, the last known IP of the host is kept. A
+    positive rtt is the round-trip time measured by the check, in seconds,
+    and is folded into the host's round-trip statistics for probe_type
+    (see probe_timeout()); the statistics survive the entry expiring. Entries
+    older than CACHE_MAX_AGE are dropped. Concurrent invocations of lanssh
+    are serialized through a lock file, and failures to update the cache
+    are ignored since it is only an optimization.
+    '''
+    now: float = time.time()
+    try:
+        with open(CACHE_LOCK_EXPAND, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            hosts: dict = {}
+            for (cached_mac, entry) in __read_hosts().items():
+                if (__entry_valid(entry) and now - entry["seen"] < CACHE_MAX_AGE):
+                    hosts[cached_mac] = entry
+
+            previous: dict = hosts.get(mac.lower(), {})
+            if (ip == ""):
+                ip = previous.get("ip", "")
+
+            rtts: dict = dict(previous.get("rtt", {}))
+            if (rtt > 0):
+                rtts[probe_type] = __update_rtt(rtts.get(probe_type), rtt)
+
+            hosts[mac.lower()] = {
+                "ip": ip, "seen": now, "reachable": reachable, "probe": probe_type
+            }
+            if (rtts != {}):
+                hosts[mac.lower()]["rtt"] = rtts
+            __write_hosts(hosts)
+    except OSError:
+        pass
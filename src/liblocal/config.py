@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/config.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import ipaddress
+import json
+import os
+
+from .errno import *
+from .const import *
+
+errno: int = 0
+errdesc: str = ""
+
+__config: dict = {}
+
+
+def __valid_list(key: str, value: list) -> bool:
+    for item in value:
+        if (type(item) != str):
+            return False
+        if (key == "subnets"):
+            try:
+                ipaddress.ip_network(item, strict = False)
+            except ValueError:
+                return False
+    return True
+
+
+def read_config() -> dict:
+    f'''
+    Returns the settings from {CONFIG} merged over CONFIG_DEFAULTS. A missing
+    file is not an error, since every setting has a default. Returns an empty
+    dictionary if the file cannot be parsed or holds invalid settings.
+    '''
+    global errno, errdesc, __config
+    if (__config != {}):
+        return __config
+
+    data: dict = {}
+    if (os.path.isfile(CONFIG_EXPAND) and os.path.getsize(CONFIG_EXPAND) != 0):
+        try:
+            with open(CONFIG_EXPAND) as config_file:
+                data = json.load(config_file)
+        except json.decoder.JSONDecodeError:
+            errdesc = f"Failed to parse settings. Verify if {CONFIG}"\
+            " has a valid JSON format."
+            errno = ERR_CONFIG_INVALID
+            return {}
+
+    if (type(data) != dict):
+        errdesc = f"Settings in {CONFIG} must be a JSON object."
+        errno = ERR_CONFIG_INVALID
+        return {}
+
+    for (key, value) in data.items():
+        if (key not in CONFIG_DEFAULTS):
+            errdesc = f"Unknown setting \"{key}\" in {CONFIG}."
+            errno = ERR_CONFIG_INVALID
+            return {}
+
+        expected: type = type(CONFIG_DEFAULTS[key])
+        if (expected == float and type(value) == int):
+            value = float(value)
+        if (type(value) != expected or (expected in (int, float) and value < 0) or
+            (expected == list and not __valid_list(key, value))):
+            errdesc = f"Setting \"{key}\" in {CONFIG} has an invalid value.\n"\
+            f"Helpful search string (cause of error): \"{value}\""
+            errno = ERR_CONFIG_INVALID
+            return {}
+
+    __config = dict(CONFIG_DEFAULTS)
+    for (key, value) in data.items():
+        __config[key] = type(CONFIG_DEFAULTS[key])(value)
+
+    return __config
+
+
+def get_setting(key: str) -> object:
+    '''
+    Returns the value of a single setting, or its default if the settings
+    file is unusable. Callers that need to report a broken settings file
+    should call read_config() first.
+    '''
+    config: dict = read_config()
+    if (config == {}):
+        get_last_error()
+        return CONFIG_DEFAULTS[key]
+    return config[key]
+
+
+def get_last_error() -> tuple:
+    '''
+    Returns the most recent error as a tuple after resetting errno and errdesc.
+    Tuple format: (errno, errdesc)
+    '''
+    global errdesc, errno
+    last_errdesc: str = errdesc
+    last_errno: int = errno
+    if (errdesc != ""):
+        errdesc = ""
+    if (errno != 0):
+        errno = 0
+    return (last_errno, last_errdesc)
@@ -21,21 +21,122 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 
+import math
 import re
 import os
 
-__cpu_count = os.cpu_count()
-
 SUPPORTED_PLATFORMS = {
     "linux"
 }
 
-MULTIPROC_PCOUNT = __cpu_count if __cpu_count is not None else 5
 VERSION = "1.0"
 DATABASE = "~/.lanssh/db.json"
 DB_EXPAND = os.path.expanduser(DATABASE)
+CONFIG = "~/.lanssh/config.json"
+CONFIG_EXPAND = os.path.expanduser(CONFIG)
+CACHE = "~/.lanssh/cache.json"
+CACHE_EXPAND = os.path.expanduser(CACHE)
+CACHE_LOCK_EXPAND = CACHE_EXPAND + ".lock"
+LEASE_INDEX = "~/.lanssh/leases.json"
+LEASE_INDEX_EXPAND = os.path.expanduser(LEASE_INDEX)
+# Per-user socket of lansshd, in the runtime directory when there is one
+DAEMON_SOCKET_EXPAND = os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR", os.path.expanduser("~/.lanssh")), "lansshd.sock"
+)
+DHCP_LEASE_FILES = [
+        "/var/lib/misc/dnsmasq.leases",
+        "/var/lib/dhcp/dhcpd.leases",
+        "/var/lib/dhcpd/dhcpd.leases"
+]
 MAC_PATTERN = re.compile(r"([0-9A-Fa-f]{2}[:]){5}([0-9A-Fa-f]{2})")
+MAC_SEPARATOR = ","
 MAX_ALIASNAME_LENGTH = 16
+PROC_NET_ARP = "/proc/net/arp"
+ATF_COM = 0x02
+PROBE_TIMEOUT = 1.0
+NO_DEADLINE = math.inf
+NEIGHBOR_READ_TIMEOUT = 2.0
+PROBE_RATE = 1000
+PROBE_MAX_CONCURRENCY = 1024
+PROBE_FD_RESERVE = 64
+PING_MAX_CONCURRENCY = 64
+SSH_PORT = 22
+CACHE_PROBE_TIMEOUT = 0.25
+CACHE_MAX_AGE = 7 * 24 * 3600
+ADAPTIVE_TIMEOUT_MIN = 0.05
+ADAPTIVE_TIMEOUT_MAX = 3.0
+RTT_ALPHA = 0.125
+RTT_BETA = 0.25
+RTT_K = 4
+DISCARD_PORT = 9
+SWEEP_TIMEOUT = 3.0
+SWEEP_RATE = 500
+SWEEP_MIN_PREFIX = 22
+SWEEP_CHECK_INTERVAL = 0.05
+RACE_STAGGER = 0.25
+HEDGE_WINDOW = 0.2
+LISTEN_REFRESH_INTERVAL = 10.0
+LISTEN_RELOAD_INTERVAL = 1.0
+PASSIVE_TRUST_TIME = 30.0
+DAEMON_QUERY_TIMEOUT = 0.5
+DAEMON_HEAD_START = 0.05
+DAEMON_CLIENT_TIMEOUT = 5.0
+DAEMON_REFRESH_INTERVAL = 5.0
+DAEMON_FRESH_TIME = 15.0
+DAEMON_IDLE_TIMEOUT = 900.0
+DAEMON_MAX_LINE = 4096
+NEIGHBOR_WATCH_RCVBUF = 1 << 20
+WAIT_BACKOFF_MIN = 0.25
+WAIT_BACKOFF_MAX = 2.0
+WAKE_PACKETS = 3
+WAKE_TIMEOUT = 120.0
+WAKE_BACKOFF_MAX = 0.5
+WAKE_PROBE_TIMEOUT = 0.5
+DNS_ADDRESS = "127.0.0.1"
+DNS_TTL = 5
+DNS_RESOLVE_TIMEOUT = 1.0
+DNS_RESOLVE_DEADLINE = 3 * DNS_RESOLVE_TIMEOUT
+DNS_MAX_MESSAGE = 65535
+
+PROBE_ICMP = "icmp"
+PROBE_TCP = "tcp"
+PROBE_SSH = "ssh"
+PROBE_ARP = "arp"
+PROBE_KERNEL = "kernel"
+PROBE_TYPES = (PROBE_ICMP, PROBE_ARP, PROBE_KERNEL, PROBE_TCP, PROBE_SSH)
+# Recorded in the cache as the probe type of hosts heard by lan.iter_learn()
+PROBE_PASSIVE = "passive"
+# Probe types that a REACHABLE neighbor entry already answers for
+LINK_PROBE_TYPES = (PROBE_ICMP, PROBE_ARP, PROBE_KERNEL)
+
+# Changes to the neighbor table, as passed to the callbacks of lan.watch_neighbors()
+NEIGHBOR_ADDED = "added"
+NEIGHBOR_CHANGED = "changed"
+NEIGHBOR_DELETED = "deleted"
+
+# Phases of waiting for a host, as reported by lan.wait_for_host()
+WAIT_LINK = "answered on the link"
+WAIT_SSH = "ssh port open"
+
+FAMILY_IPV4 = "ipv4"
+FAMILY_IPV6 = "ipv6"
+ADDRESS_FAMILIES = (FAMILY_IPV4, FAMILY_IPV6)
+FAMILY_STAGGER = 0.1
+
+RESOLVER_DAEMON = "daemon"
+RESOLVER_LEASES = "leases"
+RESOLVER_CACHE = "cache"
+RESOLVER_NEIGHBORS = "neighbors"
+RESOLVER_SWEEP = "sweep"
+# Resolvers used when neither the "resolvers" setting nor the alias names any
+RESOLVER_CHAIN = [RESOLVER_DAEMON, RESOLVER_LEASES, RESOLVER_CACHE, RESOLVER_NEIGHBORS]
+
+# Outcomes of a resolver, as reported by resolve_mac()
+RESOLVER_ANSWERED = "answered"
+RESOLVER_UNREACHABLE = "unreachable"
+RESOLVER_FAILED = "failed"
+RESOLVER_CANCELLED = "cancelled"
+RESOLVER_SKIPPED = "skipped"
 
 VALID_OPTIONS = {
         "U"  : ("-u", "--user"),
@@ -45,7 +146,55 @@ VALID_OPTIONS = {
         "F"  : ("-f", "--format"),
         "H"  : ("-h", "--help"),
         "RA" : ("-ra", "--rm-alias"),
-        "RD" : ("-rd", "--rmdb")
+        "RD" : ("-rd", "--rmdb"),
+        "P"  : ("-p", "--probe"),
+        "NC" : ("-nc", "--no-cache"),
+        "SW" : ("-sw", "--sweep"),
+        "SC" : ("-sc", "--scan"),
+        "DL" : ("-dl", "--deadline"),
+        "TM" : ("-tm", "--timing"),
+        "LS" : ("-ls", "--listen"),
+        "W"  : ("-w", "--wait"),
+        "WK" : ("-wk", "--wake"),
+        "AW" : ("-aw", "--auto-wake")
+}
+
+# Options that only modify the login pattern (1), mapped to the number of
+# values they take.
+LOGIN_MODIFIERS = {
+        "P"  : 1,
+        "NC" : 0,
+        "SW" : 0,
+        "DL" : 1,
+        "TM" : 0,
+        "W"  : 1,
+        "AW" : 0
+}
+
+# Login modifiers whose value may be left out. The value is only taken if
+# it is a number, so it cannot be mistaken for the alias.
+OPTIONAL_VALUE_MODIFIERS = ("W",)
+
+# Keys an alias entry in DATABASE may have besides "name", "mac" and
+# "default_user", each overriding the setting of the same name for it
+ALIAS_OPTIONAL_KEYS = {"resolvers", "interfaces", "subnets"}
+
+# Settings read from CONFIG, with their defaults. The type of each default
+# is the type the setting must have.
+CONFIG_DEFAULTS = {
+        "cache_ttl"          : 300.0,
+        "cache_negative_ttl" : 10.0,
+        "sweep"              : False,
+        "probe"              : PROBE_ICMP,
+        "prefer"             : FAMILY_IPV4,
+        "interfaces"         : [],
+        "subnets"            : [],
+        "deadline"           : 0.0,
+        "dhcp_leases"        : DHCP_LEASE_FILES,
+        "resolvers"          : RESOLVER_CHAIN,
+        "auto_wake"          : False,
+        "dns_port"           : 0,
+        "dns_domain"         : "lan"
 }
 
 NO_ARGS_SPECIFIED       = 0
@@ -56,6 +205,9 @@ ARGS_PATTERN_4          = 4
 ARGS_PATTERN_5          = 5
 ARGS_PATTERN_6          = 6
 ARGS_PATTERN_7          = 7
+ARGS_PATTERN_8          = 8
+ARGS_PATTERN_9          = 9
+ARGS_PATTERN_10         = 10
 ARGS_PATTERN_1_OPTIONAL = 11
 ARGS_PATTERN_4_OPTIONAL = 14
 
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/daemon.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import socket
+
+from .const import *
+
+# First file descriptor passed by systemd socket activation, see
+# sd_listen_fds(3)
+SD_LISTEN_FDS_START = 3
+
+
+def open_listener() -> tuple:
+    f'''
+    Returns a (socket, activated) tuple. If lansshd was started by systemd
+    socket activation, socket is the listening socket systemd passed and
+    activated is True. Otherwise a UNIX stream socket is bound at
+    {DAEMON_SOCKET_EXPAND} (replacing a stale one), readable and writable
+    by the user only. Raises OSError if the socket cannot be bound.
+    '''
+    if (os.environ.get("LISTEN_PID") == str(os.getpid()) and
+        os.environ.get("LISTEN_FDS", "0") != "0"):
+        for variable in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+            os.environ.pop(variable, None)
+        return (socket.socket(fileno = SD_LISTEN_FDS_START), True)
+
+    os.makedirs(os.path.dirname(DAEMON_SOCKET_EXPAND), exist_ok = True)
+    if (os.path.exists(DAEMON_SOCKET_EXPAND)):
+        os.unlink(DAEMON_SOCKET_EXPAND)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask: int = os.umask(0o177)
+    try:
+        sock.bind(DAEMON_SOCKET_EXPAND)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(old_umask)
+    sock.listen()
+    return (sock, False)
+
+
+def query(mac: str, probe_type: str = PROBE_ICMP, prefer: str = FAMILY_IPV4,
+    timeout: float = DAEMON_QUERY_TIMEOUT) -> str:
+    '''
+    Asks lansshd for the IP address at which the host with the given MAC
+    address was last confirmed reachable. Returns an empty string if the
+    daemon is not running, does not know the host, or does not answer
+    within timeout seconds.
+
+    The protocol is one JSON object per line in each direction. A request
+    has the keys "mac", "probe" (the probe type the caller would use) and
+    "prefer" (one of ADDRESS_FAMILIES), and is answered by an object with
+    the key "ip", an empty string if the host is unknown. A connection may
+    carry any number of requests.
+    '''
+    if (timeout <= 0):
+        return ""
+
+    request: dict = {"mac": mac.lower(), "probe": probe_type, "prefer": prefer}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(DAEMON_SOCKET_EXPAND)
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as stream:
+                answer = json.loads(stream.readline(DAEMON_MAX_LINE))
+    except (OSError, ValueError):
+        return ""
+
+    ip: object = answer.get("ip", "") if type(answer) == dict else ""
+    return ip if type(ip) == str else ""
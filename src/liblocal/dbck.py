@@ -22,6 +22,7 @@
 
 
 from typing import List
+import ipaddress
 
 from .errno import *
 from .const import *
@@ -50,9 +51,14 @@ def check_db_format(json_data: dict) -> int:
         alias: dict = json_data["aliases"][i]
         checks.append(type(alias) == dict)
         checks.append(alias != {})
-        checks.append(checks[0] and set(alias.keys()) == {"name", "mac", "default_user"})
+        checks.append(
+            checks[0] and
+            set(alias.keys()) - ALIAS_OPTIONAL_KEYS == {"name", "mac", "default_user"}
+        )
         if (False in checks):
-            invalid_keys: list = list(set(alias.keys()) - {"name", "mac", "default_user"})
+            invalid_keys: list = list(
+                set(alias.keys()) - {"name", "mac", "default_user"} - ALIAS_OPTIONAL_KEYS
+            )
 
             if (invalid_keys == []):
                 errdesc = f"Alias entry at index {[i]} has missing "\
@@ -76,6 +82,14 @@ def check_db_format(json_data: dict) -> int:
     return 0
 
 
+def __valid_subnet(subnet: str) -> bool:
+    try:
+        ipaddress.ip_network(subnet, strict = False)
+    except ValueError:
+        return False
+    return True
+
+
 def check_db_values(json_data: dict) -> int:
     '''
     Assumes json_data has a valid format as recognized by the program.
@@ -89,23 +103,37 @@ def check_db_values(json_data: dict) -> int:
         checks.clear()
         alias: dict = json_data["aliases"][i]
         checks.append(type(alias["name"]) == str)
-        checks.append(type(alias["mac"]) == str)
+        checks.append(type(alias["mac"]) in (str, list))
         checks.append(type(alias["default_user"]) == str)
+        if (type(alias["mac"]) == list):
+            checks.append(alias["mac"] != [])
+            checks.append(False not in [type(mac) == str for mac in alias["mac"]])
+        for key in ALIAS_OPTIONAL_KEYS & set(alias.keys()):
+            checks.append(type(alias[key]) == list)
+            checks.append(
+                checks[-1] and False not in [type(item) == str for item in alias[key]]
+            )
+        if ("subnets" in alias and False not in checks):
+            checks.append(False not in [__valid_subnet(item) for item in alias["subnets"]])
 
         if (False in checks):
             errdesc = f"Alias entry at index {[i]} has invalid "\
             f"datatype for primary keys in \n{DATABASE}. Verify if \"name\", "\
             "\"mac\" and \"default_user\" have\nvalid datatypes in the given entry. "\
-            "Indexing starts from 0."
+            "\"mac\" may be a string or a non-empty list\nof strings, and "\
+            "\"resolvers\", \"interfaces\" and \"subnets\" lists of strings (the\n"\
+            "latter of networks such as \"192.168.1.0/24\"). Indexing starts from 0."
             errno = ERR_DATATYPE_INVALID
             return -1
 
-        if (MAC_PATTERN.fullmatch(alias["mac"]) is None):
-            errdesc = f"Alias entry at index {[i]} has an invalid "\
-            f"MAC address in {DATABASE}.\nIndexing starts from 0.\n"\
-            f"Helpful search string (cause of error): \"{alias['mac']}\""
-            errno = ERR_MAC_INVALID
-            return -1
+        macs: list = alias["mac"] if type(alias["mac"]) == list else [alias["mac"]]
+        for mac in macs:
+            if (MAC_PATTERN.fullmatch(mac) is None):
+                errdesc = f"Alias entry at index {[i]} has an invalid "\
+                f"MAC address in {DATABASE}.\nIndexing starts from 0.\n"\
+                f"Helpful search string (cause of error): \"{mac}\""
+                errno = ERR_MAC_INVALID
+                return -1
 
         if (alias["name"] == ""):
             errdesc = f"Alias entry at index {[i]} has an empty value for "\
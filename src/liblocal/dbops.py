@@ -87,13 +87,18 @@ def get_formatted_data(data_format: str) -> str:
         spacing: str = "    "
         for alias in data["aliases"]:
             names.append(alias["name"].capitalize())
-            macs.append(alias["mac"].upper())
+            macs.append(
+                alias["mac"] if type(alias["mac"]) == list else [alias["mac"]]
+            )
             default_users.append(alias["default_user"])
         formatted_data = "ALIAS           " + spacing + "MAC ADDRESS      " +\
             spacing + "DEFAULT USER\n"
         for i in range(len(data["aliases"])):
             formatted_data += (names[i] + " " * (MAX_ALIASNAME_LENGTH - len(names[i])))
-            formatted_data += (spacing + macs[i] + spacing + default_users[i] + "\n")
+            formatted_data += (spacing + macs[i][0].upper() + spacing + default_users[i] + "\n")
+            # Further MACs of the same host go on their own lines
+            for mac in macs[i][1:]:
+                formatted_data += (" " * MAX_ALIASNAME_LENGTH + spacing + mac.upper() + "\n")
         formatted_data = formatted_data.strip()
 
     elif (data_format == "json"):
@@ -0,0 +1,232 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/dhcp.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+import calendar
+import ipaddress
+import json
+import os
+import re
+import time
+
+from . import sockutil
+from .const import *
+
+# A complete lease declaration in an ISC dhcpd.leases file. Leases are only
+# ever appended to the file, so a later declaration for the same address
+# replaces the earlier ones.
+ISC_LEASE_PATTERN = re.compile(r"^lease\s+(\S+)\s*\{(.*?)^\}", re.MULTILINE | re.DOTALL)
+ISC_ENDS_PATTERN = re.compile(r"^\s*ends\s+(?:\d\s+(\S+\s+\S+)|epoch\s+(\d+)|(never))\s*;", re.MULTILINE)
+ISC_STATE_PATTERN = re.compile(r"^\s*binding\s+state\s+(\S+)\s*;", re.MULTILINE)
+ISC_HARDWARE_PATTERN = re.compile(r"^\s*hardware\s+ethernet\s+(\S+)\s*;", re.MULTILINE)
+ISC_TIME_FORMAT = "%Y/%m/%d %H:%M:%S"
+
+# Expiry time stored for leases that never expire
+NEVER = 0
+
+
+def __read_index() -> dict:
+    try:
+        with open(LEASE_INDEX_EXPAND) as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+    return index if type(index) == dict else {}
+
+
+def __write_index(index: dict) -> None:
+    # Renamed over the old index so readers never see a partial file. Losing
+    # the index only costs a full parse, so failures are ignored.
+    temp_path: str = f"{LEASE_INDEX_EXPAND}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as index_file:
+            index_file.write(json.dumps(index, indent = 4) + "\n")
+        os.replace(temp_path, LEASE_INDEX_EXPAND)
+    except OSError:
+        pass
+
+
+def __is_isc(text: str) -> bool:
+    # dnsmasq lines start with the expiry time; dhcpd.leases starts with a
+    # comment or a declaration.
+    for line in text.splitlines():
+        if (line.strip() != ""):
+            return not line.strip()[0].isdigit()
+    return False
+
+
+def parse_dnsmasq(text: str) -> dict:
+    '''
+    Parses the contents of a dnsmasq lease file, whose lines read
+    "<expiry> <mac> <ip> <hostname> <client-id>". Returns a dictionary
+    mapping lowercase MAC addresses to [ip, expiry] lists, expiry being a
+    UNIX time or NEVER. DHCPv6 leases, which are keyed by IAID rather than
+    MAC, are left out.
+    '''
+    leases: dict = {}
+    for line in text.splitlines():
+        fields: list = line.split()
+        if (len(fields) < 3 or not fields[0].isdigit()):
+            continue
+        if (MAC_PATTERN.fullmatch(fields[1]) is None or not sockutil.valid_ip(fields[2])):
+            continue
+        leases[fields[1].lower()] = [fields[2], int(fields[0])]
+    return leases
+
+
+def parse_isc(text: str, leases: dict) -> int:
+    '''
+    Parses the lease declarations in text, the contents of an ISC
+    dhcpd.leases file from some offset on, into leases, a dictionary mapping
+    lowercase MAC addresses to [ip, expiry] lists as for parse_dnsmasq().
+    Leases that are no longer active are removed from it. Returns the length
+    of text up to the end of the last complete declaration, so that a
+    declaration still being written is parsed the next time.
+    '''
+    consumed: int = 0
+    for match in ISC_LEASE_PATTERN.finditer(text):
+        consumed = match.end()
+        ip, body = match.group(1), match.group(2)
+        if (not sockutil.valid_ip(ip)):
+            continue
+        hardware = ISC_HARDWARE_PATTERN.search(body)
+        if (hardware is None or MAC_PATTERN.fullmatch(hardware.group(1)) is None):
+            continue
+        mac: str = hardware.group(1).lower()
+
+        state = ISC_STATE_PATTERN.search(body)
+        if (state is not None and state.group(1) != "active"):
+            if (leases.get(mac, [""])[0] == ip):
+                leases.pop(mac)
+            continue
+
+        # Times are in UTC unless the server uses "db-time-format local",
+        # which writes them as UNIX times instead
+        ends = ISC_ENDS_PATTERN.search(body)
+        expiry: int = NEVER
+        if (ends is not None and ends.group(1) is not None):
+            try:
+                expiry = calendar.timegm(time.strptime(ends.group(1), ISC_TIME_FORMAT))
+            except ValueError:
+                continue
+        elif (ends is not None and ends.group(2) is not None):
+            expiry = int(ends.group(2))
+        leases[mac] = [ip, expiry]
+
+    return consumed
+
+
+def __refresh(path: str, entry: dict) -> dict:
+    # Returns the index entry for the lease file at path, re-reading only
+    # what changed since entry was made. Raises OSError if it is unreadable.
+    stat: os.stat_result = os.stat(path)
+    unchanged: bool = (
+        entry.get("inode") == stat.st_ino and
+        entry.get("mtime") == stat.st_mtime and
+        entry.get("size") == stat.st_size
+    )
+    if (unchanged and type(entry.get("leases")) == dict):
+        return entry
+
+    # dhcpd only appends to its lease file between periodic rewrites, so the
+    # new declarations are read from where the last read stopped. dnsmasq
+    # rewrites its file on every change.
+    appended: bool = (
+        entry.get("isc") == True and entry.get("inode") == stat.st_ino and
+        type(entry.get("offset")) == int and entry["offset"] <= stat.st_size and
+        type(entry.get("leases")) == dict
+    )
+    offset: int = entry["offset"] if appended else 0
+
+    with open(path, "rb") as lease_file:
+        lease_file.seek(offset)
+        # latin-1 keeps one character per byte, so offsets stay byte offsets
+        text: str = lease_file.read().decode("latin-1")
+
+    if (appended or __is_isc(text)):
+        leases: dict = dict(entry["leases"]) if appended else {}
+        offset += parse_isc(text, leases)
+        isc: bool = True
+    else:
+        leases = parse_dnsmasq(text)
+        offset = len(text)
+        isc = False
+
+    return {
+        "inode": stat.st_ino, "mtime": stat.st_mtime, "size": stat.st_size,
+        "offset": offset, "isc": isc, "leases": leases
+    }
+
+
+def __in_subnets(ip: str, subnets: list) -> bool:
+    if (subnets == []):
+        return True
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    for subnet in subnets:
+        if (address in ipaddress.ip_network(subnet, strict = False)):
+            return True
+    return False
+
+
+def lookup(mac: str, paths: list = DHCP_LEASE_FILES, subnets: list = []) -> list:
+    f'''
+    Returns the IP addresses currently leased to the host with the given
+    MAC address according to the dnsmasq or ISC dhcpd lease files in paths,
+    or an empty list. Expired leases are left out, and so are addresses
+    outside subnets if it is not empty. The format of each file is
+    detected from its contents; missing or unreadable files are skipped.
+
+    The leases are kept in an index at {LEASE_INDEX}, and a lease file is
+    only read again once its size or modification time changes. Of an ISC
+    file, only the declarations appended since are read.
+    '''
+    index: dict = __read_index()
+    updated: dict = {}
+    ips: list = []
+    now: float = time.time()
+
+    for path in paths:
+        entry: object = index.get(path, {})
+        try:
+            updated[path] = __refresh(path, entry if type(entry) == dict else {})
+        except OSError:
+            continue
+
+        lease: object = updated[path]["leases"].get(mac.lower())
+        if (type(lease) != list or len(lease) != 2):
+            continue
+        # The index is only read back, but may still be edited or damaged
+        ip, expiry = lease
+        if (type(ip) != str or not sockutil.valid_ip(ip) or type(expiry) != int):
+            continue
+        if ((expiry == NEVER or expiry > now) and __in_subnets(ip, subnets)):
+            ips.append(ip)
+
+    if (updated != {k: v for (k, v) in index.items() if k in updated}):
+        __write_index(updated)
+
+    return list(dict.fromkeys(ips))
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/dns.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import socket
+import struct
+
+# DNS message format, see RFC 1035 section 4
+HEADER_FORMAT = "!HHHHHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+QUESTION_FORMAT = "!HH"
+QUESTION_SIZE = struct.calcsize(QUESTION_FORMAT)
+ANSWER_FORMAT = "!HHHIH"
+# Answers name the question through a compression pointer to it, which
+# always starts right after the header
+QNAME_POINTER = 0xC000 | HEADER_SIZE
+
+FLAG_QR = 0x8000
+FLAG_AA = 0x0400
+FLAG_TC = 0x0200
+FLAG_RD = 0x0100
+OPCODE_MASK = 0x7800
+OPCODE_QUERY = 0
+
+RCODE_NOERROR = 0
+RCODE_FORMERR = 1
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+RCODE_NOTIMP = 4
+RCODE_REFUSED = 5
+
+TYPE_A = 1
+TYPE_AAAA = 28
+TYPE_ANY = 255
+CLASS_IN = 1
+CLASS_ANY = 255
+
+MAX_LABEL_LENGTH = 63
+# Largest response sent over UDP to clients that do not use EDNS
+MAX_UDP_SIZE = 512
+
+
+def __parse_name(data: bytes, offset: int) -> tuple:
+    # Returns (name, offset past it), or () if the name is malformed.
+    # Questions are never compressed, so pointers are not followed.
+    labels: list = []
+    while (offset < len(data)):
+        length: int = data[offset]
+        offset += 1
+        if (length == 0):
+            return (".".join(labels).lower(), offset)
+        if (length > MAX_LABEL_LENGTH or offset + length > len(data)):
+            return ()
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    return ()
+
+
+def parse_query(data: bytes) -> tuple:
+    '''
+    Parses a DNS query. Returns a (query_id, flags, name, qtype, qclass,
+    question) tuple, name being lowercase and without the trailing dot, and
+    question the raw question section. question is empty if the header is
+    fine but the message does not hold exactly one well-formed question, to
+    be answered with RCODE_FORMERR. Returns an empty tuple for anything that
+    is not a query at all, which is best dropped.
+    '''
+    if (len(data) < HEADER_SIZE):
+        return ()
+
+    query_id, flags, qdcount, _, _, _ = struct.unpack_from(HEADER_FORMAT, data)
+    if (flags & FLAG_QR):
+        return ()
+    if (qdcount != 1):
+        return (query_id, flags, "", 0, 0, b"")
+
+    parsed: tuple = __parse_name(data, HEADER_SIZE)
+    if (parsed == () or parsed[1] + QUESTION_SIZE > len(data)):
+        return (query_id, flags, "", 0, 0, b"")
+
+    name, offset = parsed
+    qtype, qclass = struct.unpack_from(QUESTION_FORMAT, data, offset)
+    return (query_id, flags, name, qtype, qclass, data[HEADER_SIZE:offset + QUESTION_SIZE])
+
+
+def build_response(query: tuple, rcode: int, ips: list = [], ttl: int = 0,
+    max_size: int = 0) -> bytes:
+    '''
+    Builds the authoritative response to a query parsed by parse_query(),
+    answering it with an A or AAAA record for each IPv4 or IPv6 address in
+    ips, each to be cached for ttl seconds. If max_size is positive and the
+    response would be larger, the answers are left out and the TC flag is
+    set, so that the client asks again over TCP.
+    '''
+    query_id, flags, _, _, _, question = query
+    answers: bytes = b""
+    for ip in ips:
+        family: int = socket.AF_INET6 if ":" in ip else socket.AF_INET
+        rdata: bytes = socket.inet_pton(family, ip)
+        rrtype: int = TYPE_AAAA if family == socket.AF_INET6 else TYPE_A
+        answers += struct.pack(ANSWER_FORMAT, QNAME_POINTER, rrtype, CLASS_IN, ttl, len(rdata))
+        answers += rdata
+
+    flags = FLAG_QR | FLAG_AA | (flags & (OPCODE_MASK | FLAG_RD)) | rcode
+    if (max_size > 0 and HEADER_SIZE + len(question) + len(answers) > max_size):
+        flags |= FLAG_TC
+        answers, ips = b"", []
+
+    header: bytes = struct.pack(
+        HEADER_FORMAT, query_id, flags, int(question != b""), len(ips), 0, 0
+    )
+    return header + question + answers
@@ -33,6 +33,13 @@ ERR_ALIAS_EXISTS         = -9
 ERR_ALIASNAME_HAS_SPACE  = -10
 ERR_ALIAS_NOT_FOUND      = -11
 ERR_UNSUPPORTED_FORMAT   = -12
+ERR_UNSUPPORTED_PROBE    = -13
+ERR_CONFIG_INVALID       = -14
+ERR_DEADLINE_INVALID     = -15
+ERR_RESOLVER_UNKNOWN     = -16
+ERR_LISTEN_FAILED        = -17
+ERR_WAIT_INVALID         = -18
+ERR_WAKE_FAILED          = -19
 
 
 errno: int = 0
@@ -0,0 +1,222 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/icmp.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Iterator
+import os
+import selectors
+import socket
+import struct
+import time
+
+from . import sockutil
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+ICMP_HEADER_FORMAT = "!BBHHH"
+ICMP_HEADER_SIZE = struct.calcsize(ICMP_HEADER_FORMAT)
+ICMP_PAYLOAD = b"lanssh\0\0"
+
+RECV_BUFSIZE = 2048
+
+
+def __checksum(data: bytes) -> int:
+    if (len(data) % 2 != 0):
+        data += b"\0"
+    total: int = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += (total >> 16)
+    return (~total) & 0xFFFF
+
+
+def __family_of(ip: str) -> int:
+    return socket.AF_INET6 if ":" in ip else socket.AF_INET
+
+
+def open_socket(family: int = socket.AF_INET, device: str = "") -> tuple:
+    '''
+    Opens an ICMP (or, for AF_INET6, ICMPv6) socket for sending echo
+    requests, bound to the network interface device if one is given and the
+    user may do so. An unprivileged datagram socket is preferred; a raw
+    socket is used if the user is not within net.ipv4.ping_group_range.
+    Returns a (socket, is_raw) tuple. Raises OSError if neither kind of
+    socket can be opened.
+    '''
+    proto: int = socket.IPPROTO_ICMPV6 if family == socket.AF_INET6 else socket.IPPROTO_ICMP
+    try:
+        sock, is_raw = (socket.socket(family, socket.SOCK_DGRAM, proto), False)
+    except OSError:
+        sock, is_raw = (socket.socket(family, socket.SOCK_RAW, proto), True)
+    sockutil.bind_to_device(sock, device)
+    return (sock, is_raw)
+
+
+def is_available() -> bool:
+    '''
+    Returns True if an ICMP socket can be opened by the current user.
+    '''
+    try:
+        sock, _ = open_socket()
+    except OSError:
+        return False
+    sock.close()
+    return True
+
+
+def pack_echo_request(ident: int, seq: int, family: int = socket.AF_INET) -> bytes:
+    '''
+    Returns an ICMP echo request with the given identifier and sequence
+    number. The kernel overwrites the identifier on datagram sockets, and
+    fills in the checksum of ICMPv6 messages itself.
+    '''
+    if (family == socket.AF_INET6):
+        header = struct.pack(ICMP_HEADER_FORMAT, ICMPV6_ECHO_REQUEST, 0, 0, ident, seq)
+        return header + ICMP_PAYLOAD
+
+    header: bytes = struct.pack(ICMP_HEADER_FORMAT, ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum: int = __checksum(header + ICMP_PAYLOAD)
+    header = struct.pack(ICMP_HEADER_FORMAT, ICMP_ECHO_REQUEST, 0, checksum, ident, seq)
+    return header + ICMP_PAYLOAD
+
+
+def parse_echo_reply(data: bytes, is_raw: bool, family: int = socket.AF_INET) -> tuple:
+    '''
+    Returns the (ident, seq) pair of an ICMP echo reply, or an empty tuple if
+    data is not one. Raw IPv4 sockets deliver the IPv4 header along with the
+    ICMP message, which is skipped here. ICMPv6 sockets never do.
+    '''
+    reply_type: int = ICMPV6_ECHO_REPLY if family == socket.AF_INET6 else ICMP_ECHO_REPLY
+    if (is_raw and family == socket.AF_INET):
+        if (len(data) < 20):
+            return ()
+        data = data[(data[0] & 0x0F) * 4:]
+
+    if (len(data) < ICMP_HEADER_SIZE):
+        return ()
+
+    msgtype, _, _, ident, seq = struct.unpack_from(ICMP_HEADER_FORMAT, data)
+    if (msgtype != reply_type):
+        return ()
+
+    return (ident, seq)
+
+
+def iter_probe(ips: list, timeout: float, devices: dict = {},
+    rate: int = 0) -> Iterator[tuple]:
+    '''
+    Sends one echo request to each address in ips and waits up to timeout
+    seconds after each for its reply, yielding an (ip, rtt) tuple as soon as
+    each address answers, rtt being in seconds. IPv4 and IPv6 addresses may
+    be mixed. Link-local IPv6 addresses need their scope, e.g.
+    "fe80::1%eth0". devices optionally maps addresses to the interface they
+    are to be probed through. Every family and interface gets a socket of
+    its own, and all of them are waited on together. If rate is positive, at
+    most rate requests are sent per second, interleaved with receiving the
+    replies. Closing the generator early closes the sockets. Raises OSError
+    if no socket can be opened for a family in ips.
+    '''
+    ident: int = os.getpid() & 0xFFFF
+    targets: list = list(dict.fromkeys(ips))
+    # socket -> (family, is_raw)
+    sockets: dict = {}
+    # seq -> (ip, sent_at)
+    pending: dict = {}
+    selector = selectors.DefaultSelector()
+
+    try:
+        # (family, device) -> socket
+        senders: dict = {}
+        for ip in targets:
+            route: tuple = (__family_of(ip), devices.get(ip, ""))
+            if (route not in senders):
+                sock, is_raw = open_socket(*route)
+                sockets[sock] = (route[0], is_raw)
+                senders[route] = sock
+                selector.register(sock, selectors.EVENT_READ)
+
+        seq: int = 0
+        sent: int = 0
+        started_at: float = time.monotonic()
+        while (sent < len(targets) or pending != {}):
+            now: float = time.monotonic()
+            due: int = len(targets) if rate <= 0 else\
+                min(len(targets), int((now - started_at) * rate) + 1)
+            while (sent < due):
+                ip = targets[sent]
+                family: int = __family_of(ip)
+                seq = (seq + 1) & 0xFFFF
+                sent += 1
+                try:
+                    senders[(family, devices.get(ip, ""))].sendto(
+                        pack_echo_request(ident, seq, family), sockutil.sockaddr(ip, 0)
+                    )
+                except OSError:
+                    continue
+                pending[seq] = (ip, time.monotonic())
+
+            now = time.monotonic()
+            for expired in [s for s in pending if pending[s][1] + timeout <= now]:
+                pending.pop(expired)
+
+            wait: float = min([entry[1] + timeout - now for entry in pending.values()] +
+                [timeout if sent == len(targets) else started_at + sent / rate - now])
+            if (pending == {} and sent == len(targets)):
+                break
+            ready: list = selector.select(max(0.0, wait))
+
+            for (key, _) in ready:
+                sock = key.fileobj
+                family, is_raw = sockets[sock]
+                try:
+                    data, addr = sock.recvfrom(RECV_BUFSIZE)
+                except OSError:
+                    continue
+
+                reply: tuple = parse_echo_reply(data, is_raw, family)
+                if (reply == () or reply[1] not in pending):
+                    continue
+                if (is_raw and reply[0] != ident):
+                    continue
+
+                # The source address comes back without its scope; the scope
+                # id is the fourth item of addr instead
+                ip, sent_at = pending[reply[1]]
+                if (addr[0] != ip.split("%")[0]):
+                    continue
+
+                pending.pop(reply[1])
+                yield (ip, time.monotonic() - sent_at)
+    finally:
+        for sock in sockets:
+            sock.close()
+        selector.close()
+
+
+def probe(ips: list, timeout: float, devices: dict = {}, rate: int = 0) -> dict:
+    '''
+    Like iter_probe(), but waits for all replies and returns a dictionary
+    mapping every address that answered to its round-trip time in seconds.
+    '''
+    return dict(iter_probe(ips, timeout, devices, rate))
@@ -21,39 +21,1352 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 
+from typing import AsyncIterator, Callable, Iterator, List
+import asyncio
+import concurrent.futures
+import errno
+import functools
 import subprocess
-import multiprocessing
+import ipaddress
+import math
+import queue
+import resource
+import threading
+import shutil
+import socket
+import time
 
+from . import arp
+from . import cache
+from . import daemon
+from . import dhcp
+from . import icmp
+from . import netlink
+from . import sniff
+from . import sockutil
+from . import tcp
+from . import wol
 from .const import *
 
-def is_ip_reachable(ip: str) -> bool:
-    proc = subprocess.run(["ping", "-c", "1", "-W", "1", ip],
+def is_ip_reachable(ip: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    # Older versions of ping only take whole seconds for -W
+    proc = subprocess.run(["ping", "-c", "1", "-W", str(math.ceil(timeout)), ip],
     stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL, text = True)
     return (proc.returncode == 0)
 
 
-def get_reachable_hosts() -> dict:
-    proc = subprocess.run(["ip", "-4", "neigh", "show"],
-    stdout = subprocess.PIPE, stderr = subprocess.PIPE, text = True)
-    procresultlines: List[str] = list(filter(len, proc.stdout.split("\n")))
-    hosts: dict = {}
+def __scoped(ip: str, ifname: str) -> str:
+    # A link-local IPv6 address is ambiguous without the interface it was
+    # seen on, so it carries that as its scope, e.g. "fe80::1%eth0".
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    if (ifname == "" or address.version != 6 or not address.is_link_local):
+        return ip
+    return f"{ip}%{ifname}"
+
+
+def __ifname(ifindex: int) -> str:
+    try:
+        return socket.if_indextoname(ifindex)
+    except OSError:
+        return ""
+
+
+def __read_netlink_neighbors() -> list:
+    if (__watch_started.is_set()):
+        with __watch_lock:
+            return [
+                (ip, mac, state, ifname) for ((ip, ifname), (mac, state, _))
+                in __watched.items() if state & netlink.NUD_NOARP == 0
+            ]
+
+    neighbors: list = []
+    for family in (socket.AF_INET, socket.AF_INET6):
+        for (ip, mac, ifindex, state) in netlink.dump_neighbors(family):
+            if (state & netlink.NUD_NOARP == 0):
+                ifname: str = __ifname(ifindex)
+                neighbors.append((__scoped(ip, ifname), mac, state, ifname))
+    return neighbors
 
-    if (procresultlines == []):
-        return {}
+
+def __read_proc_arp() -> list:
+    # /proc/net/arp has no NUD state, so complete entries are reported as
+    # NUD_STALE, i.e. to be verified before use.
+    neighbors: list = []
+    with open(PROC_NET_ARP) as arp:
+        next(arp, "")  # Skip the column headers
+        for line in arp:
+            fields: List[str] = line.split()
+            if (len(fields) < 4 or MAC_PATTERN.fullmatch(fields[3]) is None):
+                continue
+            if (int(fields[2], 16) & ATF_COM == 0):
+                continue
+            ifname: str = fields[5] if len(fields) > 5 else ""
+            neighbors.append((fields[0], fields[3].lower(), netlink.NUD_STALE, ifname))
+    return neighbors
+
+
+def __read_ip_neigh() -> list:
+    try:
+        proc = subprocess.run(["ip", "neigh", "show"],
+        stdout = subprocess.PIPE, stderr = subprocess.PIPE, text = True,
+        timeout = NEIGHBOR_READ_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return []
+    procresultlines: List[str] = list(filter(len, proc.stdout.split("\n")))
+    neighbors: list = []
 
     for line in procresultlines:
         mac_match = MAC_PATTERN.search(line)
         if (mac_match is not None):
-            mac: str = mac_match.group(0)
-            ip: str  = line.split()[0]
-            hosts[mac] = ip
+            fields: List[str] = line.split()
+            mac: str = mac_match.group(0).lower()
+            ifname: str = fields[fields.index("dev") + 1] if "dev" in fields[:-1] else ""
+            ip: str  = __scoped(fields[0], ifname)
+            state: int = netlink.NUD_NAMES.get(fields[-1], netlink.NUD_NONE)
+            neighbors.append((ip, mac, state, ifname))
+
+    return neighbors
+
+
+def __in_scope(ip: str, ifname: str, interfaces: list, subnets: list) -> bool:
+    if (interfaces != [] and ifname not in interfaces):
+        return False
+    if (subnets == []):
+        return True
+    if (not sockutil.valid_ip(ip)):
+        return False
+    address = ipaddress.ip_address(ip.split("%")[0])
+    for subnet in subnets:
+        if (address in ipaddress.ip_network(subnet, strict = False)):
+            return True
+    return False
+
+
+def __read_neighbors() -> list:
+    try:
+        return __read_netlink_neighbors()
+    except OSError:
+        pass
+
+    if (shutil.which("ip")):
+        return __read_ip_neigh()
+
+    try:
+        return __read_proc_arp()
+    except OSError:
+        return []
+
+
+def get_neighbors(interfaces: list = [], subnets: list = [], mac: str = "") -> list:
+    '''
+    Returns the IPv4 (ARP) and IPv6 (NDP) neighbor tables as a list of
+    (ip, mac, state) tuples, where state is the NUD state of the entry (see
+    netlink.NUD_*). Link-local IPv6 addresses carry the interface they were
+    seen on as their scope, e.g. "fe80::1%eth0". Entries without a
+    link-layer address are left out. MAC addresses are lowercase. The tables
+    are read in-process over rtnetlink, falling back to "ip neigh show" if
+    iproute2 is present, and finally to /proc/net/arp, which only has the
+    IPv4 table. If interfaces is not empty, only entries on those network
+    interfaces are returned; if subnets (a list of networks such as
+    "192.168.1.0/24") is not empty, only entries within one of them are;
+    if mac is not empty, only the entries for that MAC are. While
+    watch_neighbors() is running, the entries come from its index instead,
+    and looking them up for a single MAC takes constant time.
+    '''
+    neighbors: list = []
+    if (mac != "" and __watch_started.is_set()):
+        neighbors = [
+            (ip, mac.lower(), state, ifname) for (ip, ifname, state, _)
+            in lookup_neighbors(mac) if state & netlink.NUD_NOARP == 0
+        ]
+    else:
+        neighbors = [
+            neighbor for neighbor in __read_neighbors()
+            if mac == "" or neighbor[1] == mac.lower()
+        ]
+
+    return [
+        (ip, neighbor_mac, state) for (ip, neighbor_mac, state, ifname) in neighbors
+        if __in_scope(ip, ifname, interfaces, subnets)
+    ]
+
+
+# The neighbor table as kept up to date by watch_neighbors():
+# (ip, ifname) -> (mac, state, updated_at), updated_at being time.monotonic()
+__watched: dict = {}
+# mac -> set of (ip, ifname) keys into __watched
+__watched_by_mac: dict = {}
+__watch_callbacks: list = []
+__watch_lock: threading.Lock = threading.Lock()
+__watch_started: threading.Event = threading.Event()
+
+
+def __neighbor_key(ip: str, ifindex: int) -> tuple:
+    ifname: str = __ifname(ifindex)
+    return (__scoped(ip, ifname), ifname)
+
+
+def __update_neighbor(key: tuple, msgtype: int, mac: str, state: int) -> None:
+    # Applies one RTM_NEWNEIGH or RTM_DELNEIGH entry to the index, then tells
+    # the callbacks if that changed anything. Incomplete and failed entries
+    # carry no MAC, and keep the one they had.
+    kind: str = ""
+    with __watch_lock:
+        old_mac, old_state, _ = __watched.get(key, ("", netlink.NUD_NONE, 0.0))
+        mac = mac if mac != "" else old_mac
+        if (msgtype == netlink.RTM_DELNEIGH or mac == ""):
+            if (key in __watched):
+                __watched.pop(key)
+                __watched_by_mac[old_mac].discard(key)
+                kind = NEIGHBOR_DELETED
+            mac, state = old_mac, netlink.NUD_NONE
+        else:
+            if (old_mac != mac and key in __watched):
+                __watched_by_mac[old_mac].discard(key)
+            __watched[key] = (mac, state, time.monotonic())
+            __watched_by_mac.setdefault(mac, set()).add(key)
+            if (old_mac == ""):
+                kind = NEIGHBOR_ADDED
+            elif (old_mac != mac or old_state != state):
+                kind = NEIGHBOR_CHANGED
+        callbacks: list = list(__watch_callbacks)
+
+    if (kind != ""):
+        for callback in callbacks:
+            callback(kind, key[0], mac, state)
+
+
+def __resync_neighbors() -> None:
+    # Replaces the index with a fresh dump, reporting whatever changed since
+    dumped: set = set()
+    for family in (socket.AF_INET, socket.AF_INET6):
+        for (ip, mac, ifindex, state) in netlink.dump_neighbors(family):
+            key: tuple = __neighbor_key(ip, ifindex)
+            __update_neighbor(key, netlink.RTM_NEWNEIGH, mac, state)
+            dumped.add(key)
+
+    with __watch_lock:
+        gone: list = [key for key in __watched if key not in dumped]
+    for key in gone:
+        __update_neighbor(key, netlink.RTM_DELNEIGH, "", netlink.NUD_NONE)
+
+
+def __watch_forever(sock: socket.socket) -> None:
+    try:
+        while (True):
+            try:
+                data: bytes = sock.recv(netlink.RECV_BUFSIZE)
+            except OSError as error:
+                # The kernel dropped notifications because they came in
+                # faster than they were read, so the index may be stale
+                if (error.errno != errno.ENOBUFS):
+                    raise
+                __resync_neighbors()
+                continue
+
+            for (msgtype, _, payload) in netlink.parse_messages(data):
+                if (msgtype not in (netlink.RTM_NEWNEIGH, netlink.RTM_DELNEIGH)):
+                    continue
+                neighbor: tuple = netlink.parse_neighbor(payload, require_lladdr = False)
+                if (neighbor != ()):
+                    ip, mac, ifindex, state = neighbor
+                    __update_neighbor(__neighbor_key(ip, ifindex), msgtype, mac, state)
+    except OSError:
+        # get_neighbors() goes back to reading the table itself
+        __watch_started.clear()
+    finally:
+        sock.close()
+
+
+def watch_neighbors(callback: Callable = None) -> None:
+    '''
+    Keeps an index of the IPv4 and IPv6 neighbor tables up to date from the
+    kernel's RTM_NEWNEIGH and RTM_DELNEIGH notifications (the RTNLGRP_NEIGH
+    multicast group), in a background thread, so long-running processes
+    apply each change as it happens instead of reading the whole table
+    again. get_neighbors() reads the index from then on. The index is seeded
+    with a dump, and dumped again should the kernel ever drop
+    notifications. If callback is given, it is called as
+    callback(kind, ip, mac, state) from the watcher thread for every change
+    to an entry, kind being one of NEIGHBOR_ADDED, NEIGHBOR_CHANGED or
+    NEIGHBOR_DELETED; it must return quickly. May be called again to add
+    more callbacks; the watcher is only started once. Raises OSError if
+    netlink is unavailable.
+    '''
+    with __watch_lock:
+        if (callback is not None):
+            __watch_callbacks.append(callback)
+    if (__watch_started.is_set()):
+        return
+
+    # Subscribed before the dump, so no change falls in between
+    sock: socket.socket = netlink.open_socket(netlink.RTMGRP_NEIGH)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, NEIGHBOR_WATCH_RCVBUF)
+    try:
+        __resync_neighbors()
+    except OSError:
+        sock.close()
+        raise
+    __watch_started.set()
+    threading.Thread(target = __watch_forever, args = (sock,), daemon = True).start()
+
+
+def unwatch_neighbors(callback: Callable) -> None:
+    '''
+    Stops calling a callback passed to watch_neighbors(). The index itself
+    keeps being updated.
+    '''
+    with __watch_lock:
+        if (callback in __watch_callbacks):
+            __watch_callbacks.remove(callback)
+
+
+def lookup_neighbors(mac: str) -> list:
+    '''
+    Returns the entries for mac in the index kept by watch_neighbors(), as
+    a list of (ip, ifname, state, updated_at) tuples, updated_at being the
+    time.monotonic() of the last change to the entry. Returns an empty list
+    if watch_neighbors() has not been started.
+    '''
+    with __watch_lock:
+        return [
+            (ip, ifname) + __watched[(ip, ifname)][1:]
+            for (ip, ifname) in __watched_by_mac.get(mac.lower(), set())
+        ]
+
+
+def __timed_ping(ip: str, timeout: float) -> tuple:
+    started_at: float = time.monotonic()
+    if (not is_ip_reachable(ip, timeout)):
+        return (ip, -1.0)
+    return (ip, time.monotonic() - started_at)
+
+
+def __probe_concurrency(fds_per_probe: int, limit: int = PROBE_MAX_CONCURRENCY) -> int:
+    # Waiting on the network costs file descriptors rather than CPU time, so
+    # the number of probes in flight is bounded by RLIMIT_NOFILE.
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if (soft_limit == resource.RLIM_INFINITY):
+        return limit
+    return max(1, min(limit, (soft_limit - PROBE_FD_RESERVE) // fds_per_probe))
+
+
+def iter_scheduled(task: Callable, items: list, limit: int,
+    rate: int = PROBE_RATE) -> Iterator[object]:
+    '''
+    Runs task(item) for every item in items in a pool of at most limit
+    threads, starting at most rate tasks per second, and yields each result
+    as soon as its task returns. Meant for blocking probes that mostly wait
+    on the network, so limit should follow from the file descriptors and
+    packet rate available, not from the number of CPUs. Closing the
+    generator early cancels the tasks that have not started yet.
+    '''
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers = max(1, min(limit, len(items)))
+    )
+    pending: set = set()
+    submitted: int = 0
+    started_at: float = time.monotonic()
+
+    try:
+        while (submitted < len(items) or pending != set()):
+            due: int = min(len(items), int((time.monotonic() - started_at) * rate) + 1)
+            while (submitted < due and len(pending) < limit):
+                pending.add(executor.submit(task, items[submitted]))
+                submitted += 1
+
+            wait: float = None
+            if (submitted < len(items) and len(pending) < limit):
+                wait = max(0.0, started_at + submitted / rate - time.monotonic())
+            if (pending == set()):
+                time.sleep(wait)
+                continue
+
+            done, pending = concurrent.futures.wait(
+                pending, timeout = wait, return_when = concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        executor.shutdown(wait = False, cancel_futures = True)
+
+
+def __iter_probe_icmp(ips: list, timeout: float, devices: dict) -> Iterator[tuple]:
+    if (ips == []):
+        return
+
+    answered: List[str] = []
+    try:
+        for (ip, rtt) in icmp.iter_probe(ips, timeout, devices, PROBE_RATE):
+            answered.append(ip)
+            yield (ip, rtt)
+        return
+    except OSError:
+        pass
+
+    # Each ping holds a process and a few pipes for the whole timeout
+    remaining: List[str] = [ip for ip in ips if ip not in answered]
+    ping: Callable = functools.partial(__timed_ping, timeout = timeout)
+    limit: int = __probe_concurrency(4, PING_MAX_CONCURRENCY)
+    for (ip, rtt) in iter_scheduled(ping, remaining, limit):
+        if (rtt >= 0):
+            yield (ip, rtt)
+
+
+def __mac_changed(ip: str, expected_mac: str) -> bool:
+    # True if the neighbor table now maps ip to a different MAC.
+    for (neigh_ip, neigh_mac, _) in get_neighbors():
+        if (neigh_ip == ip and neigh_mac != expected_mac):
+            return True
+    return False
+
+
+def __iter_probe_icmp_verified(ips: list, expected_macs: dict,
+    timeout: float) -> Iterator[tuple]:
+    for (ip, rtt) in __iter_probe_icmp(ips, timeout, __devices(ips)):
+        if (not __mac_changed(ip, expected_macs[ip])):
+            yield (ip, rtt)
+
+
+def __iter_probe_arp(expected_macs: dict, timeout: float) -> Iterator[tuple]:
+    targets: list = []
+    unroutable: List[str] = []
+    networks: list = get_local_networks()
+
+    for (ip, mac) in expected_macs.items():
+        # ARP only exists for IPv4; IPv6 addresses (and anything that is
+        # not an address) take the ICMP path
+        if (":" in ip or not sockutil.valid_ip(ip)):
+            unroutable.append(ip)
+            continue
+        address = ipaddress.ip_address(ip)
+        # An interface that went away since the networks were listed has no
+        # name, and the ICMP path will find out whether the host is still up
+        device: str = ""
+        for (local_ip, network, ifindex) in networks:
+            if (address in network):
+                device = __ifname(ifindex)
+                break
+        if (device != ""):
+            targets.append((ip, mac, device, local_ip))
+        else:
+            unroutable.append(ip)
+
+    # Targets ARP could not be sent for (e.g. on a tun or WireGuard link)
+    # take the ICMP path too
+    answered: List[str] = []
+    unsent: List[str] = []
+    try:
+        for (ip, rtt) in arp.iter_probe(targets, timeout, unsent):
+            answered.append(ip)
+            yield (ip, rtt)
+    except OSError:
+        unroutable = [ip for ip in expected_macs if ip not in answered]
+    else:
+        unroutable += unsent
+
+    yield from __iter_probe_icmp_verified(unroutable, expected_macs, timeout)
+
+
+def __iter_probe_kernel(expected_macs: dict, timeout: float) -> Iterator[tuple]:
+    entries: list = []
+    unknown: List[str] = list(expected_macs.keys())
+    # Netlink knows link-local addresses without their scope
+    scoped_ips: dict = {}
+
+    try:
+        for family in (socket.AF_INET, socket.AF_INET6):
+            for (ip, mac, ifindex, _) in netlink.dump_neighbors(family):
+                scoped_ip: str = __scoped(ip, __ifname(ifindex))
+                if (expected_macs.get(scoped_ip) == mac and scoped_ip in unknown):
+                    entries.append((ip, mac, ifindex))
+                    scoped_ips[ip] = scoped_ip
+                    unknown.remove(scoped_ip)
+    except OSError:
+        pass
+
+    # Entries the kernel refuses to re-probe are pinged instead
+    answered: List[str] = []
+    refused: List[str] = []
+    try:
+        for (ip, rtt) in netlink.iter_revalidate_neighbors(entries, timeout, refused):
+            answered.append(scoped_ips[ip])
+            yield (scoped_ips[ip], rtt)
+    except OSError:
+        unknown = [ip for ip in expected_macs if ip not in answered]
+    else:
+        unknown += [scoped_ips[ip] for ip in refused]
+
+    yield from __iter_probe_icmp_verified(unknown, expected_macs, timeout)
+
+
+def __devices(ips: list) -> dict:
+    # Maps each address to the interface it is to be probed through: the
+    # scope of link-local IPv6 addresses, otherwise the interface of the
+    # local network the address belongs to. Addresses on no local network,
+    # and anything that is not an address at all, are left to the routing
+    # table.
+    devices: dict = {}
+    networks: list = get_local_networks()
+    for ip in ips:
+        if ("%" in ip):
+            devices[ip] = ip.split("%")[1]
+            continue
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            continue
+        for (_, network, ifindex) in networks:
+            if (address in network):
+                devices[ip] = __ifname(ifindex)
+                break
+    return devices
+
+
+def iter_probe_ips(ips: list, timeout: float = PROBE_TIMEOUT,
+    probe_type: str = PROBE_ICMP, expected_macs: dict = {}) -> Iterator[tuple]:
+    '''
+    Probes every address in ips concurrently and yields an (ip, rtt) tuple
+    as soon as each address is found reachable, rtt being its round-trip time
+    in seconds. IPv4 and IPv6 addresses may be mixed and are probed alongside
+    each other; link-local IPv6 addresses need their scope. Each probe is
+    bound to the interface of the local network its address is on (when the
+    user has CAP_NET_RAW), and the probes of all interfaces run at once, so
+    a slow interface never holds up the others. Callers may stop
+    iterating at any time; closing the generator cancels the outstanding
+    probes. probe_type is one of PROBE_TYPES:
+      - icmp   : ICMP echo, sent from in-process sockets at up to
+                 PROBE_RATE requests per second. The "ping" program is only
+                 used if no ICMP socket can be opened, in which case the
+                 round-trip times include process startup and the pings are
+                 run by iter_scheduled(), at most PING_MAX_CONCURRENCY at a
+                 time.
+      - arp    : ARP who-has request on the local link. An address only
+                 counts as reachable if the reply comes from its MAC in
+                 expected_macs (a dictionary mapping IPs to MACs). Without
+                 CAP_NET_RAW, and for IPv6 addresses or addresses outside the
+                 local networks, ICMP is used instead and the neighbor table
+                 is checked for a different MAC afterwards.
+      - kernel : The kernel is asked to re-probe the neighbor entry of each
+                 address (see netlink.iter_revalidate_neighbors()) and lanssh
+                 only waits for the outcome. Like arp, this checks the MAC in
+                 expected_macs. Needs CAP_NET_ADMIN and an existing neighbor
+                 entry, otherwise icmp is used as for arp.
+      - tcp    : A TCP connection to the SSH port is accepted. No more
+                 connections are opened at once than RLIMIT_NOFILE allows.
+      - ssh    : As with tcp, and the peer also sends an SSH banner.
+    For arp and kernel, addresses missing from expected_macs are probed with
+    icmp.
+    '''
+    if (probe_type in (PROBE_TCP, PROBE_SSH)):
+        yield from tcp.iter_probe(
+            ips, SSH_PORT, timeout, read_banner = (probe_type == PROBE_SSH),
+            devices = __devices(ips), max_pending = __probe_concurrency(1)
+        )
+
+    elif (probe_type in (PROBE_ARP, PROBE_KERNEL)):
+        known_macs: dict = {ip: expected_macs[ip] for ip in ips if ip in expected_macs}
+        if (probe_type == PROBE_ARP):
+            yield from __iter_probe_arp(known_macs, timeout)
+        else:
+            yield from __iter_probe_kernel(known_macs, timeout)
+        unknown: List[str] = [ip for ip in ips if ip not in expected_macs]
+        yield from __iter_probe_icmp(unknown, timeout, __devices(unknown))
+
+    else:
+        yield from __iter_probe_icmp(ips, timeout, __devices(ips))
+
+
+def probe_ips(ips: list, timeout: float = PROBE_TIMEOUT,
+    probe_type: str = PROBE_ICMP, expected_macs: dict = {}) -> dict:
+    '''
+    Like iter_probe_ips(), but waits for every probe to finish and returns a
+    dictionary mapping each reachable address to its round-trip time.
+    '''
+    return dict(iter_probe_ips(ips, timeout, probe_type, expected_macs))
+
+
+def iter_check_neighbors(neighbors: list, probe_type: str = PROBE_ICMP,
+    timeout: float = PROBE_TIMEOUT) -> Iterator[tuple]:
+    '''
+    Decides which of the given (ip, mac, state) neighbor entries are
+    reachable and yields an (ip, rtt) tuple for each, as soon as it is
+    known. The kernel's NUD state is taken into account first:
+      - FAILED and INCOMPLETE entries are dropped without probing.
+      - REACHABLE entries have been confirmed by the kernel within its
+        reachable time, so they are trusted with a round-trip time of 0
+        when probe_type is icmp, arp or kernel, and are yielded first. The
+        tcp and ssh probes check for the SSH server rather than the host,
+        so those entries are probed anyway.
+      - Everything else (STALE, DELAY, PROBE, PERMANENT) is probed with
+        iter_probe_ips(), waiting up to timeout seconds.
+    '''
+    trusted: List[str] = []
+    expected_macs: dict = {}
+
+    for (ip, mac, state) in neighbors:
+        if (state & (netlink.NUD_FAILED | netlink.NUD_INCOMPLETE)):
+            continue
+        if (state & netlink.NUD_REACHABLE and probe_type in LINK_PROBE_TYPES):
+            trusted.append(ip)
+        else:
+            expected_macs[ip] = mac
+
+    for ip in dict.fromkeys(trusted):
+        yield (ip, 0.0)
+
+    to_probe: List[str] = [ip for ip in expected_macs if ip not in trusted]
+    yield from iter_probe_ips(to_probe, timeout, probe_type, expected_macs)
+
+
+def check_neighbors(neighbors: list, probe_type: str = PROBE_ICMP,
+    timeout: float = PROBE_TIMEOUT) -> dict:
+    '''
+    Like iter_check_neighbors(), but waits for every probe to finish and
+    returns a dictionary mapping the IPs of the reachable entries to their
+    round-trip times in seconds.
+    '''
+    return dict(iter_check_neighbors(neighbors, probe_type, timeout))
+
+
+def iter_reachable_hosts(probe_type: str = PROBE_ICMP, interfaces: list = [],
+    subnets: list = []) -> Iterator[tuple]:
+    '''
+    Checks every IPv4 and IPv6 neighbor and yields a (mac, ip, rtt) tuple for each
+    reachable host as soon as it answers. Meant for listing or scanning the
+    whole LAN; use resolve_mac() to locate a single host. interfaces and
+    subnets limit the neighbors checked, as for get_neighbors(). Closing the
+    generator early cancels the outstanding probes.
+    '''
+    neighbors: list = get_neighbors(interfaces, subnets)
+    macs: dict = {ip: mac for (ip, mac, _) in neighbors}
+
+    for (ip, rtt) in iter_check_neighbors(neighbors, probe_type):
+        yield (macs[ip], ip, rtt)
+
+
+async def aiter_reachable_hosts(probe_type: str = PROBE_ICMP, interfaces: list = [],
+    subnets: list = []) -> AsyncIterator[tuple]:
+    '''
+    Asynchronous counterpart of iter_reachable_hosts(). The probes run in the
+    event loop's default executor, one step at a time, so the loop is never
+    blocked. If the consumer stops early or is cancelled, the probes are
+    cancelled once the step in progress returns.
+    '''
+    loop = asyncio.get_running_loop()
+    hosts: Iterator[tuple] = iter_reachable_hosts(probe_type, interfaces, subnets)
+    step: asyncio.Future = None
+
+    try:
+        while (True):
+            step = loop.run_in_executor(None, next, hosts, ())
+            host: tuple = await step
+            if (host == ()):
+                return
+            yield host
+    finally:
+        if (step is not None and not step.done()):
+            step.add_done_callback(lambda _: hosts.close())
+        else:
+            hosts.close()
+
+
+def get_reachable_hosts(probe_type: str = PROBE_ICMP, interfaces: list = [],
+    subnets: list = []) -> dict:
+    '''
+    Like iter_reachable_hosts(), but waits for every probe to finish and
+    returns a dictionary mapping the MAC address of each reachable host to
+    its IP.
+    '''
+    return {
+        mac: ip for (mac, ip, _) in iter_reachable_hosts(probe_type, interfaces, subnets)
+    }
+
+
+def get_local_networks() -> list:
+    '''
+    Returns the IPv4 and IPv6 networks directly attached to local interfaces
+    as a list of (local_ip, network, ifindex) tuples, network being an
+    ipaddress.IPv4Network or ipaddress.IPv6Network. Loopback addresses are
+    left out. Returns an empty list if the addresses cannot be read over
+    rtnetlink.
+    '''
+    try:
+        addresses: list = netlink.dump_addresses(socket.AF_INET) +\
+            netlink.dump_addresses(socket.AF_INET6)
+    except OSError:
+        return []
+
+    networks: list = []
+    for (ip, prefixlen, ifindex, scope) in addresses:
+        if (scope != netlink.RT_SCOPE_HOST):
+            network = ipaddress.ip_network(f"{ip}/{prefixlen}", strict = False)
+            networks.append((ip, network, ifindex))
+
+    return networks
+
+
+def __find_mac(mac: str, interfaces: list, subnets: list) -> list:
+    return [
+        neighbor for neighbor in get_neighbors(interfaces, subnets) if neighbor[1] == mac and
+        neighbor[2] & (netlink.NUD_FAILED | netlink.NUD_INCOMPLETE) == 0
+    ]
+
+
+def sweep_for_mac(mac: str, timeout: float = SWEEP_TIMEOUT, rate: int = SWEEP_RATE,
+    cancel: threading.Event = None, interfaces: list = [], subnets: list = []) -> list:
+    '''
+    Populates the neighbor table by sending an empty UDP datagram to the
+    discard port of every address in the local IPv4 networks, which makes the
+    kernel resolve each of them over ARP. The neighbor table is re-read as
+    the sweep goes, and the sweep stops as soon as an entry for mac shows up.
+    Networks larger than /SWEEP_MIN_PREFIX are skipped, at most rate
+    datagrams are sent per second, and the whole sweep takes no longer than
+    timeout seconds, or until cancel (if given) is set. interfaces and
+    subnets limit the addresses swept and the entries looked at, as for
+    get_neighbors(). Returns the (ip, mac, state) entries found for mac, or
+    an empty list.
+    '''
+    mac = mac.lower()
+    cancel = cancel if cancel is not None else threading.Event()
+    targets: List[str] = []
+    for (local_ip, network, ifindex) in get_local_networks():
+        if (network.version != 4 or network.prefixlen < SWEEP_MIN_PREFIX):
+            continue
+        ifname: str = __ifname(ifindex)
+        targets.extend(
+            str(host) for host in network.hosts() if str(host) != local_ip and
+            __in_scope(str(host), ifname, interfaces, subnets)
+        )
+    targets = list(dict.fromkeys(targets))
+
+    if (targets == []):
+        return []
+
+    started_at: float = time.monotonic()
+    deadline: float = started_at + timeout
+    sent: int = 0
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    try:
+        while (True):
+            due: int = min(len(targets), int((time.monotonic() - started_at) * rate) + 1)
+            while (sent < due):
+                try:
+                    sock.sendto(b"", (targets[sent], DISCARD_PORT))
+                except OSError:
+                    pass
+                sent += 1
+
+            found: list = __find_mac(mac, interfaces, subnets)
+            remaining: float = deadline - time.monotonic()
+            if (found != [] or remaining <= 0):
+                return found
+            if (cancel.wait(min(SWEEP_CHECK_INTERVAL, remaining))):
+                return []
+    finally:
+        sock.close()
+
+
+def iter_learn(get_macs: Callable, interfaces: list = [], subnets: list = [],
+    refresh: float = LISTEN_REFRESH_INTERVAL) -> Iterator[tuple]:
+    f'''
+    Listens for the ARP packets and IPv6 neighbor advertisements that hosts
+    send anyway, without sending anything, and records the IP announced for
+    every MAC address in get_macs() (a callable returning a set or
+    dictionary of lowercase MACs) as reachable in {CACHE}, with
+    PROBE_PASSIVE as its probe type. resolve_mac() then trusts the cached
+    IP of a host heard within PASSIVE_TRUST_TIME seconds without probing it.
+    The kernel drops all other traffic before it reaches lanssh (see
+    sniff.open_socket()). get_macs() is called again every
+    LISTEN_RELOAD_INTERVAL seconds, so hosts aliased meanwhile are picked
+    up. Each address is recorded again at most every refresh seconds while
+    it keeps being heard. Yields a (mac, ip) tuple whenever a MAC is heard
+    at an IP it was not heard at before. interfaces and subnets limit
+    learning as for get_neighbors(). Runs until the caller stops iterating.
+    Raises OSError if the packet socket cannot be opened, which needs
+    CAP_NET_RAW.
+    '''
+    sock: socket.socket = sniff.open_socket()
+    sock.settimeout(LISTEN_RELOAD_INTERVAL)
+    macs: object = set()
+    reloaded_at: float = -math.inf
+    # (mac, ip) -> time it was last recorded
+    recorded: dict = {}
+
+    try:
+        while (True):
+            if (time.monotonic() - reloaded_at >= LISTEN_RELOAD_INTERVAL):
+                macs = get_macs()
+                reloaded_at = time.monotonic()
+
+            try:
+                frame, address = sock.recvfrom(sniff.SNAPLEN)
+            except socket.timeout:
+                continue
+
+            # Announcements sent by this machine itself are of no use
+            if (address[2] == socket.PACKET_OUTGOING):
+                continue
+            heard: tuple = sniff.parse_frame(frame)
+            if (heard == () or heard[1] not in macs):
+                continue
+
+            ip: str = __scoped(heard[0], address[0])
+            mac: str = heard[1]
+            if (not __in_scope(ip, address[0], interfaces, subnets)):
+                continue
+
+            last_recorded: float = recorded.get((mac, ip), -math.inf)
+            if (time.monotonic() - last_recorded < refresh):
+                continue
+            recorded[(mac, ip)] = time.monotonic()
+            cache.record(mac, ip, True, PROBE_PASSIVE)
+            if (last_recorded == -math.inf):
+                yield (mac, ip)
+    finally:
+        sock.close()
+
+
+def __family_of(ip: str) -> str:
+    return FAMILY_IPV6 if ":" in ip else FAMILY_IPV4
+
+
+def __first_reachable_of(neighbors: list, probe_type: str, timeout: float) -> tuple:
+    replies: Iterator[tuple] = iter_check_neighbors(neighbors, probe_type, timeout)
+    first: tuple = next(replies, ())
+    replies.close()
+    return first
+
+
+def __first_reachable(neighbors: list, probe_type: str, prefer: str,
+    timeout: float) -> tuple:
+    # With entries of both families, the preferred family is probed first
+    # and the other joins FAMILY_STAGGER seconds later, or as soon as the
+    # preferred one has failed. A host reachable over both is thus reached
+    # over the preferred family without waiting on a dead one.
+    preferred: list = [n for n in neighbors if __family_of(n[0]) == prefer]
+    others: list = [n for n in neighbors if __family_of(n[0]) != prefer]
+    if (preferred == [] or others == []):
+        return __first_reachable_of(neighbors, probe_type, timeout)
+
+    return race_sources([
+        (functools.partial(__first_reachable_of, preferred, probe_type, timeout), 0.0),
+        (functools.partial(__first_reachable_of, others, probe_type, timeout), FAMILY_STAGGER)
+    ])
+
+
+def time_remaining(deadline: float) -> float:
+    '''
+    Returns the seconds left until time.monotonic() reaches deadline, or 0
+    once it has.
+    '''
+    return max(0.0, deadline - time.monotonic())
+
+
+def __queue_timeout(deadline: float) -> object:
+    # queue.Queue.get() takes None, not infinity, for no timeout
+    return None if deadline == NO_DEADLINE else time_remaining(deadline)
+
+
+def __daemon_source(mac: str, request: dict) -> tuple:
+    ip: str = daemon.query(
+        mac, request["probe_type"], request["prefer"],
+        min(DAEMON_QUERY_TIMEOUT, time_remaining(request["deadline"]))
+    )
+    # lansshd answers for every host within the settings, which an alias may
+    # narrow down
+    if (ip == "" or not ip_in_scope(ip, request["interfaces"], request["subnets"])):
+        return ()
+    return (ip, 0.0)
+
+
+def __lease_source(mac: str, request: dict) -> tuple:
+    # Leases are taken at their word, so a host with one costs no packets
+    for ip in dhcp.lookup(mac, request["lease_files"], request["subnets"]):
+        if (ip_in_scope(ip, request["interfaces"], request["subnets"])):
+            return (ip, 0.0)
+    return ()
+
+
+def __cache_source(mac: str, request: dict) -> tuple:
+    entry: dict = request["cache_entry"]
+    if (entry == {} or not entry["reachable"] or
+        not ip_in_scope(entry["ip"], request["interfaces"], request["subnets"])):
+        return ()
+
+    # The cache keeps a single IP per host, whichever family it was last
+    # seen over. If it is not of the family in prefer and the host has a
+    # neighbor entry that is, the neighbors resolver (which starts
+    # DAEMON_HEAD_START seconds in at the latest) gets the FAMILY_STAGGER
+    # head start over it that it gives the preferred family itself.
+    preferred: list = [
+        ip for (ip, _, _) in get_neighbors(request["interfaces"], request["subnets"], mac)
+        if __family_of(ip) == request["prefer"]
+    ] if __family_of(entry["ip"]) != request["prefer"] else []
+    if (preferred != [] and request["cancel"].wait(
+        min(DAEMON_HEAD_START + FAMILY_STAGGER, time_remaining(request["deadline"])))):
+        return ()
+
+    # A host heard from moments ago by iter_learn() is trusted the way a
+    # REACHABLE neighbor entry is
+    if (entry["probe"] == PROBE_PASSIVE and request["probe_type"] in LINK_PROBE_TYPES and
+        0 <= time.time() - entry["seen"] < PASSIVE_TRUST_TIME):
+        return (entry["ip"], 0.0)
+
+    rtt: float = __confirm_cached_ip(
+        entry["ip"], mac, request["probe_type"],
+        min(CACHE_PROBE_TIMEOUT, request["timeout"], time_remaining(request["deadline"]))
+    )
+    return (entry["ip"], rtt) if rtt >= 0 else ()
+
+
+def __neighbor_source(mac: str, request: dict) -> tuple:
+    candidates: list = get_neighbors(request["interfaces"], request["subnets"], mac)
+    return __first_reachable(
+        candidates, request["probe_type"], request["prefer"],
+        min(request["timeout"], time_remaining(request["deadline"]))
+    )
+
+
+def __sweep_source(mac: str, request: dict) -> tuple:
+    found: list = sweep_for_mac(
+        mac, min(SWEEP_TIMEOUT, time_remaining(request["deadline"])),
+        cancel = request["cancel"], interfaces = request["interfaces"],
+        subnets = request["subnets"]
+    )
+    return __first_reachable(
+        found, request["probe_type"], request["prefer"],
+        min(request["timeout"], time_remaining(request["deadline"]))
+    )
+
+
+# Resolvers by name, in the order they were registered. See register_resolver().
+__resolvers: dict = {}
+
+
+def register_resolver(name: str, source: Callable, delay: float = 0.0,
+    cached: bool = False) -> None:
+    '''
+    Makes a resolution backend available to resolve_mac() under name,
+    replacing any resolver registered under the same name. source is called
+    as source(mac, request) in a thread of its own and returns an (ip, rtt)
+    tuple for an IP confirmed to belong to mac (rtt being the round-trip
+    time measured in seconds, or 0), or an empty tuple. request is a
+    dictionary with the keys "probe_type", "prefer", "interfaces",
+    "subnets" and "deadline" (the arguments of resolve_mac()), "timeout"
+    (how long a probe may wait), "lease_files", "cache_entry" (the host's
+    entry from cache.lookup(), or an empty dictionary) and "cancel" (a
+    threading.Event set once resolution is over, for sources that wait).
+    The resolver starts delay seconds after resolution does, or as soon as
+    every resolver before it in the chain has failed. Resolvers for which
+    cached is True answer from remembered state and are left out when the
+    cache is not used.
+    '''
+    __resolvers[name] = {"source": source, "delay": delay, "cached": cached}
+
+
+def get_resolvers() -> list:
+    '''
+    Returns the names of the registered resolvers.
+    '''
+    return list(__resolvers)
+
+
+# A running lansshd answers within a millisecond, so the resolvers that would
+# send packets give it a head start, but not one long enough for a lansshd
+# that socket activation is still starting to hold up resolution
+register_resolver(RESOLVER_DAEMON, __daemon_source, cached = True)
+register_resolver(RESOLVER_LEASES, __lease_source, DAEMON_HEAD_START, cached = True)
+register_resolver(RESOLVER_CACHE, __cache_source, DAEMON_HEAD_START, cached = True)
+register_resolver(RESOLVER_NEIGHBORS, __neighbor_source, DAEMON_HEAD_START)
+register_resolver(RESOLVER_SWEEP, __sweep_source, delay = RACE_STAGGER)
+
+
+def __run_source(index: int, source: Callable, delay: float, results: queue.Queue,
+    cancel: threading.Event, start: threading.Event, started: list) -> None:
+    start.wait(delay)
+    if (cancel.is_set()):
+        return
+    started[index] = time.monotonic()
+    # A source that raises has failed, and must still report so, or the
+    # race would wait for it until the deadline
+    found: tuple = ()
+    try:
+        found = source()
+    except Exception:
+        pass
+    finally:
+        results.put((index, found, time.monotonic() - started[index]))
+
+
+def race_sources(sources: list, deadline: float = NO_DEADLINE,
+    report: list = None) -> tuple:
+    '''
+    Runs the resolution sources, a list of (source, delay) tuples, each in
+    its own thread. A source starts delay seconds after the race does, or
+    as soon as every source before it has failed. A source is a callable
+    taking no arguments that returns an (ip, rtt) tuple for a confirmed IP,
+    rtt being the round-trip time measured in seconds (0 if none was), or an
+    empty tuple; a source that raises an exception counts as failed. Returns
+    the first tuple returned by any source, or an empty tuple if all of
+    them fail, or once time.monotonic() reaches deadline. Sources that have
+    not started yet never do, but sources still running are neither waited
+    for nor stopped: they run on in the background until they return (a
+    source can watch an event of its own, as resolve_mac()'s sweep does
+    with the request's "cancel", to stop early). If report is a list, an (elapsed, state) tuple is appended to it for
+    each source, in order: how long the source ran in seconds and one of
+    RESOLVER_ANSWERED, RESOLVER_FAILED, RESOLVER_CANCELLED (still running
+    when the race ended) or RESOLVER_SKIPPED (never started).
+    '''
+    results: queue.Queue = queue.Queue()
+    cancel: threading.Event = threading.Event()
+    starts: List[threading.Event] = [threading.Event() for _ in sources]
+    started: List[float] = [-1.0 for _ in sources]
+    outcomes: dict = {}
+
+    # The first source has none before it to wait for
+    if (starts != []):
+        starts[0].set()
+    for (index, (source, delay)) in enumerate(sources):
+        threading.Thread(
+            target = __run_source, daemon = True,
+            args = (index, source, delay, results, cancel, starts[index], started)
+        ).start()
+
+    found: tuple = ()
+    while (found == () and len(outcomes) < len(sources)):
+        try:
+            index, found, elapsed = results.get(timeout = __queue_timeout(deadline))
+        except queue.Empty:
+            break
+        outcomes[index] = (elapsed, RESOLVER_ANSWERED if found != () else RESOLVER_FAILED)
+        for i in range(len(sources)):
+            if (False not in [j in outcomes for j in range(i)]):
+                starts[i].set()
+
+    ended_at: float = time.monotonic()
+    cancel.set()
+    for start in starts:
+        start.set()
+
+    if (report is not None):
+        for i in range(len(sources)):
+            if (i in outcomes):
+                report.append(outcomes[i])
+            elif (started[i] >= 0):
+                report.append((ended_at - started[i], RESOLVER_CANCELLED))
+            else:
+                report.append((0.0, RESOLVER_SKIPPED))
+    return found
+
+
+def ip_in_scope(ip: str, interfaces: list = [], subnets: list = []) -> bool:
+    '''
+    Returns True if the given IP address would be probed through one of
+    interfaces and lies within one of subnets, either list allowing
+    anything when empty, as for get_neighbors().
+    '''
+    if (interfaces == [] and subnets == []):
+        return True
+    return __in_scope(ip, __devices([ip]).get(ip, ""), interfaces, subnets)
+
+
+def __confirm_cached_ip(ip: str, mac: str, probe_type: str, timeout: float) -> float:
+    # A single fast probe, then make sure the address has not been handed to
+    # another host since it was cached. Returns the round-trip time, or -1.
+    replies: dict = probe_ips([ip], timeout, probe_type, {ip: mac}) if ip != "" else {}
+    if (replies == {} or __mac_changed(ip, mac)):
+        return -1.0
+
+    return replies[ip]
+
+
+def resolve_mac(mac: str, probe_type: str = PROBE_ICMP, use_cache: bool = True,
+    sweep: bool = False, prefer: str = FAMILY_IPV4, interfaces: list = [],
+    subnets: list = [], deadline: float = NO_DEADLINE, chain: list = RESOLVER_CHAIN,
+    lease_files: list = DHCP_LEASE_FILES, report: list = None) -> str:
+    f'''
+    Returns the IP address at which the host with the given MAC address is
+    currently reachable, or an empty string if it is not.
+
+    The resolvers named in chain (see register_resolver()) race each other
+    through race_sources(), in that order, and the first IP confirmed to
+    belong to the MAC wins. Unknown names are ignored. The built-in
+    resolvers are:
+      - daemon    : The IP lansshd last confirmed for the MAC, if it is
+                    running (see daemon.query()). leases, cache and
+                    neighbors start DAEMON_HEAD_START seconds later, or as
+                    soon as it has failed, so a login it answers sends
+                    nothing on the network.
+      - leases    : An unexpired lease for the MAC in lease_files, the lease
+                    files of a DHCP server on this machine (see
+                    dhcp.lookup()). Nothing is probed.
+      - cache     : The IP in a recent positive entry in {CACHE}, confirmed
+                    with a single fast probe. A recent negative result with
+                    the same probe type fails resolution at once. An IP not
+                    of the family in prefer holds back while the host has
+                    a neighbor entry that is.
+      - neighbors : The IPv4 and IPv6 neighbor entries for that MAC (not the
+                    whole neighbor table), the first of them found
+                    reachable. Entries of the family in prefer (one of
+                    ADDRESS_FAMILIES) get a FAMILY_STAGGER seconds head
+                    start.
+      - sweep     : A sweep of the local networks with sweep_for_mac(),
+                    started RACE_STAGGER seconds later, or as soon as the
+                    resolvers before it have failed. Added to the end of
+                    chain if sweep is True.
+    If use_cache is False, daemon, leases and cache (and any resolver
+    registered as cached) are left out. Every probe waits for the host's own timeout from
+    cache.probe_timeout(), learned from its past round-trip times, or
+    PROBE_TIMEOUT if use_cache is False. interfaces and subnets limit every
+    resolver to those network interfaces and networks, as for
+    get_neighbors(). Resolution gives up once time.monotonic() reaches
+    deadline, and every probe and sweep is cut short to end by then. The
+    outcome, along with the round-trip time measured, is recorded in the
+    cache, unless the deadline cut resolution short without finding the
+    host.
+
+    If report is a list, a dictionary is appended to it for each resolver
+    used, with the keys "mac", "resolver", "elapsed" (seconds) and "state"
+    (see race_sources(); RESOLVER_UNREACHABLE for a negative cache entry).
+    '''
+    mac = mac.lower()
+    names: list = [
+        name for name in dict.fromkeys(chain + ([RESOLVER_SWEEP] if sweep else []))
+        if name in __resolvers and (use_cache or not __resolvers[name]["cached"])
+    ]
+    request: dict = {
+        "probe_type": probe_type, "prefer": prefer, "interfaces": interfaces,
+        "subnets": subnets, "deadline": deadline, "lease_files": lease_files,
+        "timeout": cache.probe_timeout(mac, probe_type) if use_cache else PROBE_TIMEOUT,
+        "cache_entry": cache.lookup(mac) if RESOLVER_CACHE in names else {},
+        "cancel": threading.Event()
+    }
+
+    entry: dict = request["cache_entry"]
+    if (entry != {} and not entry["reachable"] and entry["probe"] == probe_type):
+        if (report is not None):
+            report.append({
+                "mac": mac, "resolver": RESOLVER_CACHE, "elapsed": 0.0,
+                "state": RESOLVER_UNREACHABLE
+            })
+        return ""
+
+    outcomes: list = []
+    found: tuple = race_sources(
+        [
+            (functools.partial(__resolvers[name]["source"], mac, request),
+            __resolvers[name]["delay"]) for name in names
+        ],
+        deadline = deadline, report = outcomes
+    )
+    request["cancel"].set()
+    if (report is not None):
+        for (name, (elapsed, state)) in zip(names, outcomes):
+            report.append({"mac": mac, "resolver": name, "elapsed": elapsed, "state": state})
+
+    if (found == () and time_remaining(deadline) == 0):
+        return ""
+    ip, rtt = found if found != () else ("", 0.0)
+    cache.record(mac, ip, ip != "", probe_type, rtt)
+    return ip
+
+
+def __resolve_into(mac: str, probe_type: str, use_cache: bool, sweep: bool,
+    prefer: str, interfaces: list, subnets: list, deadline: float, chain: list,
+    lease_files: list, report: list, results: queue.Queue) -> None:
+    results.put((mac, resolve_mac(
+        mac, probe_type, use_cache, sweep, prefer, interfaces, subnets, deadline,
+        chain, lease_files, report
+    )))
+
+
+def resolve_macs(macs: list, probe_type: str = PROBE_ICMP, use_cache: bool = True,
+    sweep: bool = False, prefer: str = FAMILY_IPV4, interfaces: list = [],
+    subnets: list = [], deadline: float = NO_DEADLINE, chain: list = RESOLVER_CHAIN,
+    lease_files: list = DHCP_LEASE_FILES, report: list = None,
+    window: float = HEDGE_WINDOW) -> list:
+    '''
+    Resolves every MAC address in macs (the interfaces of one host) at once
+    with resolve_mac() and returns a list of (mac, ip) tuples for the
+    interfaces at which the host is reachable, in the order of macs. Once
+    the first IP is found, the other MACs only get window more seconds, so
+    a dead interface never delays a live one. None of them are waited for
+    past deadline. The resolvers of each MAC report into report as they
+    finish, so MACs still being resolved on return are missing from it.
+    '''
+    macs = list(dict.fromkeys(mac.lower() for mac in macs))
+    if (len(macs) == 1):
+        ip: str = resolve_mac(
+            macs[0], probe_type, use_cache, sweep, prefer, interfaces, subnets, deadline,
+            chain, lease_files, report
+        )
+        return [(macs[0], ip)] if ip != "" else []
+
+    results: queue.Queue = queue.Queue()
+    for mac in macs:
+        threading.Thread(
+            target = __resolve_into,
+            args = (
+                mac, probe_type, use_cache, sweep, prefer, interfaces, subnets,
+                deadline, chain, lease_files, report, results
+            ),
+            daemon = True
+        ).start()
+
+    ips: dict = {}
+    window_ends: float = -1.0
+    for _ in range(len(macs)):
+        try:
+            if (window_ends < 0):
+                mac, ip = results.get(timeout = __queue_timeout(deadline))
+            else:
+                mac, ip = results.get(timeout = time_remaining(min(window_ends, deadline)))
+        except queue.Empty:
+            break
+        if (ip == ""):
+            continue
+        ips[mac] = ip
+        if (window_ends < 0):
+            window_ends = time.monotonic() + window
+
+    return [(mac, ips[mac]) for mac in macs if mac in ips]
+
+
+def __notify_on_neighbor(macs: set, changed: threading.Event, seen: dict, kind: str,
+    ip: str, mac: str, state: int) -> None:
+    # Anything but a failed or deleted entry means the host may be back, and
+    # a reachable one that it answers on the link
+    if (mac not in macs or kind == NEIGHBOR_DELETED or
+        state & (netlink.NUD_FAILED | netlink.NUD_INCOMPLETE)):
+        return
+    if (state & netlink.NUD_REACHABLE):
+        seen.setdefault(mac, time.monotonic())
+    changed.set()
+
+
+def __wait_candidates(macs: list, interfaces: list, subnets: list,
+    lease_files: list) -> dict:
+    # Every address the host may come back at, mapped to its MAC: its
+    # neighbor entries, the IP it was last seen at and its DHCP leases
+    candidates: dict = {}
+    for mac in macs:
+        for (ip, _, state) in get_neighbors(interfaces, subnets, mac):
+            if (state & (netlink.NUD_FAILED | netlink.NUD_INCOMPLETE) == 0):
+                candidates[ip] = mac
+        for ip in [cache.last_ip(mac)] + dhcp.lookup(mac, lease_files, subnets):
+            if (ip != "" and ip not in candidates and ip_in_scope(ip, interfaces, subnets)):
+                candidates[ip] = mac
+    return candidates
+
+
+def wait_for_host(macs: list, interfaces: list = [], subnets: list = [],
+    lease_files: list = DHCP_LEASE_FILES, deadline: float = NO_DEADLINE,
+    timeout: float = PROBE_TIMEOUT, backoff_max: float = WAIT_BACKOFF_MAX,
+    report: list = None, started_at: float = None) -> list:
+    '''
+    Waits for the host with the given MAC addresses (the interfaces of one
+    host) to accept connections on the SSH port, e.g. while it boots, and
+    returns a list with the (mac, ip) tuple it was reached at, or an empty
+    list once time.monotonic() reaches deadline. Only the addresses the
+    host may come back at are probed: its neighbor entries, the IP it was
+    last seen at in the cache and its DHCP leases in lease_files. Probing
+    the old IP also makes the kernel look for it on the link. Each probe
+    waits up to timeout seconds for an answer. Between rounds, lanssh
+    sleeps from WAIT_BACKOFF_MIN up to backoff_max seconds, doubling each
+    time, but a change to a neighbor entry of the host (see
+    watch_neighbors()) starts the next round at once and resets the
+    backoff. An IP that answers but whose neighbor entry has meanwhile gone
+    to another MAC is not taken. interfaces and subnets limit the addresses
+    probed, as for get_neighbors(). The host is recorded in the cache as
+    reachable with the tcp probe.
+
+    If report is a list, a dictionary with the keys "mac", "phase" and
+    "elapsed" is appended to it when the kernel first finds a MAC reachable
+    (WAIT_LINK) and when the host accepts the connection (WAIT_SSH),
+    "elapsed" being the seconds since started_at (a time.monotonic() value,
+    the start of the wait by default).
+    '''
+    started_at = started_at if started_at is not None else time.monotonic()
+    macs = list(dict.fromkeys(mac.lower() for mac in macs))
+    changed: threading.Event = threading.Event()
+    seen: dict = {}
+    callback: Callable = functools.partial(__notify_on_neighbor, set(macs), changed, seen)
+    try:
+        watch_neighbors(callback)
+    except OSError:
+        pass
+
+    found: list = []
+    backoff: float = WAIT_BACKOFF_MIN
+    try:
+        while (found == [] and time_remaining(deadline) > 0):
+            changed.clear()
+            candidates: dict = __wait_candidates(macs, interfaces, subnets, lease_files)
+            replies: dict = probe_ips(
+                list(candidates), min(timeout, time_remaining(deadline)), PROBE_TCP
+            )
+            for ip in sorted(replies, key = replies.get):
+                if (not __mac_changed(ip, candidates[ip])):
+                    cache.record(candidates[ip], ip, True, PROBE_TCP, replies[ip])
+                    found = [(candidates[ip], ip)]
+                    break
+
+            if (found != []):
+                break
+            if (changed.wait(min(backoff, time_remaining(deadline)))):
+                backoff = WAIT_BACKOFF_MIN
+            else:
+                backoff = min(2 * backoff, backoff_max)
+    finally:
+        unwatch_neighbors(callback)
+
+    if (report is not None):
+        for mac in sorted(seen, key = seen.get):
+            report.append({"mac": mac, "phase": WAIT_LINK, "elapsed": seen[mac] - started_at})
+        for (mac, _) in found:
+            report.append(
+                {"mac": mac, "phase": WAIT_SSH, "elapsed": time.monotonic() - started_at}
+            )
+    return found
+
 
-    with multiprocessing.Pool(processes = MULTIPROC_PCOUNT) as pool:
-        all_macs: tuple = tuple(hosts.keys())
-        all_ips: tuple = tuple(hosts.values())
-        result = pool.map(is_ip_reachable, all_ips)
-        for i in range(len(result)):
-            if (not result[i]): hosts.pop(all_macs[i])
+def wake_host(macs: list, interfaces: list = [], subnets: list = [],
+    lease_files: list = DHCP_LEASE_FILES) -> list:
+    '''
+    Sends a Wake-on-LAN magic packet for each of the given MAC addresses
+    (WAKE_PACKETS times, as UDP may drop one) to the broadcast address of
+    the local IPv4 networks the host was last seen on according to the
+    cache or holds a DHCP lease in, or of all local IPv4 networks if it is
+    not known to be on any. interfaces and subnets limit the networks, as
+    for get_neighbors(). Returns the broadcast addresses sent to, which is
+    empty if there is no network with one (point-to-point links and /31 or
+    /32 networks have none).
+    '''
+    macs = list(dict.fromkeys(mac.lower() for mac in macs))
+    known: list = []
+    for mac in macs:
+        known += [cache.last_ip(mac)] + dhcp.lookup(mac, lease_files, subnets)
+    # A link-local IPv6 address at least tells the interface
+    known_ips: list = [
+        ipaddress.ip_address(ip) for ip in known if sockutil.valid_ip(ip) and ":" not in ip
+    ]
+    known_ifnames: list = [ip.split("%")[1] for ip in known if "%" in ip]
 
-    return hosts
+    targets: list = []
+    homes: list = []
+    for (local_ip, network, ifindex) in get_local_networks():
+        ifname: str = __ifname(ifindex)
+        if (network.version != 4 or network.prefixlen >= 31 or
+            not __in_scope(local_ip, ifname, interfaces, subnets)):
+            continue
+        targets.append((str(network.broadcast_address), local_ip))
+        if (ifname in known_ifnames or True in [ip in network for ip in known_ips]):
+            homes.append(targets[-1])
 
+    return wol.send(macs, homes or targets, WAKE_PACKETS)
@@ -25,6 +25,7 @@ import os
 import shutil
 import platform
 
+from . import icmp
 from .const import *
 from .texts import *
 
@@ -33,10 +34,11 @@ def platform_supported() -> bool:
 
 
 def prereq_installed() -> bool:
-    for req in ("ip", "ping"):
-        if (not shutil.which(req)):
-            return False
-    return True
+    '''
+    The "ping" program is only needed if lanssh cannot open an ICMP socket
+    of its own, see icmp.open_socket().
+    '''
+    return (icmp.is_available() or shutil.which("ping") is not None)
 
 
 def mkdb() -> None:
@@ -0,0 +1,369 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/netlink.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Callable, Iterator
+import os
+import selectors
+import socket
+import struct
+import time
+
+NETLINK_ROUTE = 0
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+RTM_NEWADDR = 20
+RTM_GETADDR = 22
+RTM_NEWNEIGH = 28
+RTM_DELNEIGH = 29
+RTM_GETNEIGH = 30
+
+NLM_F_REQUEST = 0x001
+NLM_F_ACK = 0x004
+NLM_F_REPLACE = 0x100
+NLM_F_DUMP = 0x300
+
+RTMGRP_NEIGH = 0x4
+
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+
+RT_SCOPE_UNIVERSE = 0
+RT_SCOPE_LINK = 253
+RT_SCOPE_HOST = 254
+
+NDA_DST = 1
+NDA_LLADDR = 2
+
+NUD_INCOMPLETE = 0x01
+NUD_REACHABLE = 0x02
+NUD_STALE = 0x04
+NUD_DELAY = 0x08
+NUD_PROBE = 0x10
+NUD_FAILED = 0x20
+NUD_NOARP = 0x40
+NUD_PERMANENT = 0x80
+NUD_NONE = 0x00
+
+NUD_NAMES = {
+    "INCOMPLETE" : NUD_INCOMPLETE,
+    "REACHABLE"  : NUD_REACHABLE,
+    "STALE"      : NUD_STALE,
+    "DELAY"      : NUD_DELAY,
+    "PROBE"      : NUD_PROBE,
+    "FAILED"     : NUD_FAILED,
+    "NOARP"      : NUD_NOARP,
+    "PERMANENT"  : NUD_PERMANENT,
+    "NONE"       : NUD_NONE
+}
+
+NLMSGHDR_FORMAT = "=LHHLL"
+NDMSG_FORMAT = "=BBHiHBB"
+IFADDRMSG_FORMAT = "=BBBBi"
+RTATTR_FORMAT = "=HH"
+
+NLMSGHDR_SIZE = struct.calcsize(NLMSGHDR_FORMAT)
+NDMSG_SIZE = struct.calcsize(NDMSG_FORMAT)
+IFADDRMSG_SIZE = struct.calcsize(IFADDRMSG_FORMAT)
+RTATTR_SIZE = struct.calcsize(RTATTR_FORMAT)
+
+RECV_BUFSIZE = 65536
+DUMP_TIMEOUT = 2.0
+
+
+def __align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def open_socket(groups: int = 0) -> socket.socket:
+    '''
+    Opens and binds a NETLINK_ROUTE socket, subscribed to the given multicast
+    groups bitmask. Raises OSError if netlink is unavailable.
+    '''
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+    try:
+        sock.bind((0, groups))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def pack_message(msgtype: int, flags: int, seq: int, payload: bytes) -> bytes:
+    '''
+    Prepends a netlink message header to payload.
+    '''
+    header: bytes = struct.pack(
+        NLMSGHDR_FORMAT, NLMSGHDR_SIZE + len(payload), msgtype, flags, seq, 0
+    )
+    return header + payload
+
+
+def pack_attr(attrtype: int, value: bytes) -> bytes:
+    '''
+    Returns a single rtattr carrying value, padded to the netlink alignment.
+    '''
+    length: int = RTATTR_SIZE + len(value)
+    attr: bytes = struct.pack(RTATTR_FORMAT, length, attrtype) + value
+    return attr + b"\0" * (__align(length) - length)
+
+
+def parse_messages(data: bytes) -> list:
+    '''
+    Splits a datagram received from a netlink socket into a list of
+    (msgtype, seq, payload) tuples.
+    '''
+    messages: list = []
+    offset: int = 0
+
+    while (offset + NLMSGHDR_SIZE <= len(data)):
+        length, msgtype, _, seq, _ = struct.unpack_from(NLMSGHDR_FORMAT, data, offset)
+        if (length < NLMSGHDR_SIZE or offset + length > len(data)):
+            break
+        messages.append((msgtype, seq, data[offset + NLMSGHDR_SIZE:offset + length]))
+        offset += __align(length)
+
+    return messages
+
+
+def parse_attrs(data: bytes, offset: int) -> dict:
+    '''
+    Returns the rtattrs found in data from offset onwards as a dictionary
+    mapping the attribute type to its raw value.
+    '''
+    attrs: dict = {}
+
+    while (offset + RTATTR_SIZE <= len(data)):
+        length, attrtype = struct.unpack_from(RTATTR_FORMAT, data, offset)
+        if (length < RTATTR_SIZE or offset + length > len(data)):
+            break
+        attrs[attrtype] = data[offset + RTATTR_SIZE:offset + length]
+        offset += __align(length)
+
+    return attrs
+
+
+def check_error(payload: bytes) -> None:
+    '''
+    Raises OSError if the NLMSG_ERROR payload carries a non-zero error code.
+    An error code of zero is an acknowledgement and is ignored.
+    '''
+    code: int = struct.unpack_from("=i", payload)[0]
+    if (code != 0):
+        raise OSError(-code, os.strerror(-code))
+
+
+def parse_neighbor(payload: bytes, require_lladdr: bool = True) -> tuple:
+    '''
+    Parses the payload of an RTM_NEWNEIGH or RTM_DELNEIGH message. Returns an
+    (ip, mac, ifindex, state) tuple, or an empty tuple if the entry has no
+    destination address or no Ethernet link-layer address. If require_lladdr
+    is False, entries without a link-layer address are returned with an
+    empty mac instead.
+    '''
+    if (len(payload) < NDMSG_SIZE):
+        return ()
+
+    family, _, _, ifindex, state, _, _ = struct.unpack_from(NDMSG_FORMAT, payload)
+    attrs: dict = parse_attrs(payload, NDMSG_SIZE)
+    dst: bytes = attrs.get(NDA_DST, b"")
+    lladdr: bytes = attrs.get(NDA_LLADDR, b"")
+
+    if (dst == b"" or (len(lladdr) != 6 and (require_lladdr or lladdr != b""))):
+        return ()
+
+    try:
+        ip: str = socket.inet_ntop(family, dst)
+    except (OSError, ValueError):
+        return ()
+
+    mac: str = ":".join(f"{byte:02x}" for byte in lladdr)
+    return (ip, mac, ifindex, state)
+
+
+def parse_address(payload: bytes) -> tuple:
+    '''
+    Parses the payload of an RTM_NEWADDR message. Returns an
+    (ip, prefixlen, ifindex, scope) tuple, or an empty tuple if the message
+    carries no address.
+    '''
+    if (len(payload) < IFADDRMSG_SIZE):
+        return ()
+
+    family, prefixlen, _, scope, ifindex = struct.unpack_from(IFADDRMSG_FORMAT, payload)
+    attrs: dict = parse_attrs(payload, IFADDRMSG_SIZE)
+    # IFA_LOCAL is the interface's own address; IFA_ADDRESS is the peer on
+    # point-to-point links and equal to IFA_LOCAL elsewhere.
+    address: bytes = attrs.get(IFA_LOCAL, attrs.get(IFA_ADDRESS, b""))
+
+    if (address == b""):
+        return ()
+
+    try:
+        ip: str = socket.inet_ntop(family, address)
+    except (OSError, ValueError):
+        return ()
+
+    return (ip, prefixlen, ifindex, scope)
+
+
+def __dump(request_type: int, header: bytes, reply_type: int, parse: Callable) -> list:
+    seq: int = 1
+    request: bytes = pack_message(request_type, NLM_F_REQUEST | NLM_F_DUMP, seq, header)
+    entries: list = []
+
+    sock = open_socket()
+    sock.settimeout(DUMP_TIMEOUT)
+    try:
+        sock.send(request)
+        while (True):
+            data: bytes = sock.recv(RECV_BUFSIZE)
+            if (data == b""):
+                return entries
+
+            for (msgtype, msgseq, payload) in parse_messages(data):
+                if (msgseq != seq):
+                    continue
+                if (msgtype == NLMSG_DONE):
+                    return entries
+                if (msgtype == NLMSG_ERROR):
+                    check_error(payload)
+                    continue
+                if (msgtype == reply_type):
+                    entry: tuple = parse(payload)
+                    if (entry != ()):
+                        entries.append(entry)
+    finally:
+        sock.close()
+
+
+def dump_neighbors(family: int = socket.AF_INET) -> list:
+    '''
+    Dumps the kernel neighbor table for the given address family through an
+    RTM_GETNEIGH request. Returns a list of (ip, mac, ifindex, state) tuples.
+    Raises OSError if the table cannot be read over netlink, or the kernel
+    takes longer than DUMP_TIMEOUT seconds to answer.
+    '''
+    return __dump(
+        RTM_GETNEIGH, struct.pack(NDMSG_FORMAT, family, 0, 0, 0, 0, 0, 0),
+        RTM_NEWNEIGH, parse_neighbor
+    )
+
+
+def dump_addresses(family: int = socket.AF_INET) -> list:
+    '''
+    Dumps the addresses assigned to local interfaces for the given address
+    family through an RTM_GETADDR request. Returns a list of
+    (ip, prefixlen, ifindex, scope) tuples. Raises OSError if the addresses
+    cannot be read over netlink.
+    '''
+    return __dump(
+        RTM_GETADDR, struct.pack(IFADDRMSG_FORMAT, family, 0, 0, 0, 0),
+        RTM_NEWADDR, parse_address
+    )
+
+
+def iter_revalidate_neighbors(entries: list, timeout: float,
+    refused: list = None) -> Iterator[tuple]:
+    '''
+    Asks the kernel to re-probe each (ip, mac, ifindex) neighbor entry in
+    entries by setting it to NUD_PROBE, so that it sends unicast ARP or NDP
+    probes to the entry's link-layer address on its own, then waits up to
+    timeout seconds on neighbor notifications. The link-layer address is
+    never overwritten; mac is only compared against the notifications.
+    Yields an (ip, rtt) tuple as soon as ip becomes REACHABLE at the expected
+    MAC, rtt being the time that took in seconds. IPs that become FAILED,
+    are deleted or answer from another MAC are left out. If the kernel
+    refuses the request for an entry (e.g. with EINVAL or EOPNOTSUPP from a
+    driver that cannot probe), its IP is appended to refused, if given, so
+    the caller can check it some other way. Closing the generator early
+    closes the socket. Raises OSError if netlink is unavailable or the user
+    lacks CAP_NET_ADMIN.
+    '''
+    # ip -> (mac, started_at)
+    pending: dict = {}
+    # seq -> ip, for requests not yet acknowledged
+    unacked: dict = {}
+
+    sock = open_socket(RTMGRP_NEIGH)
+    try:
+        for (seq, (ip, mac, ifindex)) in enumerate(entries, start = 1):
+            family: int = socket.AF_INET6 if ":" in ip else socket.AF_INET
+            request: bytes = pack_message(
+                RTM_NEWNEIGH, NLM_F_REQUEST | NLM_F_ACK | NLM_F_REPLACE, seq,
+                struct.pack(NDMSG_FORMAT, family, 0, 0, ifindex, NUD_PROBE, 0, 0) +
+                pack_attr(NDA_DST, socket.inet_pton(family, ip))
+            )
+            sock.send(request)
+            pending[ip] = (mac.lower(), time.monotonic())
+            unacked[seq] = ip
+
+        deadline: float = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(sock, selectors.EVENT_READ)
+            while (pending != {}):
+                remaining: float = deadline - time.monotonic()
+                if (remaining <= 0 or selector.select(remaining) == []):
+                    break
+
+                for (msgtype, seq, payload) in parse_messages(sock.recv(RECV_BUFSIZE)):
+                    if (msgtype == NLMSG_ERROR and seq in unacked):
+                        ip: str = unacked.pop(seq)
+                        try:
+                            check_error(payload)
+                        except PermissionError:
+                            raise
+                        except OSError:
+                            pending.pop(ip, None)
+                            if (refused is not None):
+                                refused.append(ip)
+                        continue
+
+                    if (msgtype not in (RTM_NEWNEIGH, RTM_DELNEIGH)):
+                        continue
+
+                    neighbor: tuple = parse_neighbor(payload, require_lladdr = False)
+                    if (neighbor == () or neighbor[0] not in pending):
+                        continue
+
+                    ip, mac, _, state = neighbor
+                    expected_mac, started_at = pending[ip]
+                    if (msgtype == RTM_DELNEIGH or
+                        state & (NUD_FAILED | NUD_INCOMPLETE) or
+                        (mac != "" and mac != expected_mac)):
+                        pending.pop(ip)
+                    elif (state & NUD_REACHABLE):
+                        pending.pop(ip)
+                        yield (ip, time.monotonic() - started_at)
+    finally:
+        sock.close()
+
+
+def revalidate_neighbors(entries: list, timeout: float, refused: list = None) -> dict:
+    '''
+    Like iter_revalidate_neighbors(), but waits for all entries and returns a
+    dictionary mapping each IP that became REACHABLE at the expected MAC to
+    the time that took, in seconds.
+    '''
+    return dict(iter_revalidate_neighbors(entries, timeout, refused))
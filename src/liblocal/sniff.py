@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/sniff.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import ctypes
+import socket
+import struct
+
+from . import arp
+
+ETH_P_ALL = 0x0003
+ETH_P_IPV6 = 0x86DD
+ETH_TYPE_OFFSET = 12
+IPPROTO_ICMPV6 = 58
+IPV6_HEADER_SIZE = 40
+IPV6_NEXT_HEADER_OFFSET = arp.ETH_HEADER_SIZE + 6
+ICMPV6_OFFSET = arp.ETH_HEADER_SIZE + IPV6_HEADER_SIZE
+ND_NEIGHBOR_ADVERT = 136
+ND_OPT_TARGET_LINKADDR = 2
+
+# type, code, checksum, flags, target address
+NA_FORMAT = "!BBHI16s"
+NA_SIZE = struct.calcsize(NA_FORMAT)
+
+# Only this much of each frame is passed up, which covers an ARP packet or a
+# neighbor advertisement with its options
+SNAPLEN = 128
+
+# Classic BPF, see linux/filter.h
+SO_ATTACH_FILTER = 26
+BPF_LD_H_ABS = 0x28
+BPF_LD_B_ABS = 0x30
+BPF_JEQ_K = 0x15
+BPF_RET_K = 0x06
+BPF_INSN_FORMAT = "HBBI"
+
+# Accepts ARP frames and ICMPv6 neighbor advertisements, and drops everything
+# else in the kernel. Jump offsets count the instructions to skip.
+ARP_NA_FILTER = (
+    (BPF_LD_H_ABS, 0, 0, ETH_TYPE_OFFSET),
+    (BPF_JEQ_K, 5, 0, arp.ETH_P_ARP),
+    (BPF_JEQ_K, 0, 5, ETH_P_IPV6),
+    (BPF_LD_B_ABS, 0, 0, IPV6_NEXT_HEADER_OFFSET),
+    (BPF_JEQ_K, 0, 3, IPPROTO_ICMPV6),
+    (BPF_LD_B_ABS, 0, 0, ICMPV6_OFFSET),
+    (BPF_JEQ_K, 0, 1, ND_NEIGHBOR_ADVERT),
+    (BPF_RET_K, 0, 0, SNAPLEN),
+    (BPF_RET_K, 0, 0, 0)
+)
+
+
+def __attach_filter(sock: socket.socket, program: tuple) -> None:
+    # struct sock_fprog holds a pointer to the instructions, which must stay
+    # alive until setsockopt() has copied them
+    instructions = ctypes.create_string_buffer(
+        b"".join(struct.pack(BPF_INSN_FORMAT, *insn) for insn in program)
+    )
+    fprog: bytes = struct.pack("HP", len(program), ctypes.addressof(instructions))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def open_socket() -> socket.socket:
+    '''
+    Opens an AF_PACKET socket on all interfaces that only receives ARP
+    packets and IPv6 neighbor advertisements, filtered in the kernel by
+    ARP_NA_FILTER. Raises OSError if the user lacks CAP_NET_RAW.
+    '''
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+    try:
+        __attach_filter(sock, ARP_NA_FILTER)
+    except OSError:
+        sock.close()
+        raise
+
+    # Frames received before the filter was attached may be anything
+    sock.setblocking(False)
+    try:
+        while (True):
+            sock.recv(SNAPLEN)
+    except BlockingIOError:
+        pass
+    sock.setblocking(True)
+    return sock
+
+
+def __format_mac(mac: bytes) -> str:
+    return ":".join(f"{byte:02x}" for byte in mac)
+
+
+def __parse_arp(frame: bytes) -> tuple:
+    if (len(frame) < arp.ETH_HEADER_SIZE + arp.ARP_PACKET_SIZE):
+        return ()
+
+    htype, ptype, hlen, plen, _, sha, spa, _, _ = struct.unpack_from(
+        arp.ARP_PACKET_FORMAT, frame, arp.ETH_HEADER_SIZE
+    )
+    # A sender address of 0.0.0.0 is a host probing for a free address
+    if ((htype, ptype, hlen, plen) != (arp.ARPHRD_ETHER, arp.ETH_P_IP, 6, 4) or
+        spa == b"\0" * 4):
+        return ()
+
+    return (socket.inet_ntoa(spa), __format_mac(sha))
+
+
+def __parse_neighbor_advert(frame: bytes) -> tuple:
+    if (len(frame) < ICMPV6_OFFSET + NA_SIZE or frame[IPV6_NEXT_HEADER_OFFSET] != IPPROTO_ICMPV6):
+        return ()
+
+    icmp_type, _, _, _, target = struct.unpack_from(NA_FORMAT, frame, ICMPV6_OFFSET)
+    if (icmp_type != ND_NEIGHBOR_ADVERT or target[0] == 0xFF):
+        return ()
+
+    # The target link-layer address option names the MAC of the target, which
+    # is the Ethernet source unless a router answers by proxy
+    mac: bytes = frame[6:12]
+    offset: int = ICMPV6_OFFSET + NA_SIZE
+    while (offset + 2 <= len(frame) and frame[offset + 1] != 0):
+        option_type, option_length = frame[offset], frame[offset + 1] * 8
+        if (option_type == ND_OPT_TARGET_LINKADDR and option_length == 8 and
+            offset + 8 <= len(frame)):
+            mac = frame[offset + 2:offset + 8]
+            break
+        offset += option_length
+
+    return (socket.inet_ntop(socket.AF_INET6, target), __format_mac(mac))
+
+
+def parse_frame(frame: bytes) -> tuple:
+    '''
+    Returns the (ip, mac) pair announced by an ARP packet (the sender's, for
+    requests and replies alike) or by an IPv6 neighbor advertisement (the
+    target's) in an Ethernet frame, or an empty tuple if frame is neither.
+    mac is lowercase.
+    '''
+    if (len(frame) < arp.ETH_HEADER_SIZE):
+        return ()
+
+    ethertype: int = struct.unpack_from("!H", frame, ETH_TYPE_OFFSET)[0]
+    if (ethertype == arp.ETH_P_ARP):
+        return __parse_arp(frame)
+    if (ethertype == ETH_P_IPV6):
+        return __parse_neighbor_advert(frame)
+    return ()
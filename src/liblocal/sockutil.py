@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/sockutil.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import ipaddress
+import socket
+
+
+def sockaddr(ip: str, port: int) -> tuple:
+    '''
+    Returns the socket address for ip and port. Link-local IPv6 addresses
+    may carry their interface as a scope, e.g. "fe80::1%eth0", which
+    getaddrinfo() turns into the scope id that connect() and sendto() need
+    but do not derive on their own.
+    '''
+    family: int = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    return socket.getaddrinfo(ip, port, family, 0, 0, socket.AI_NUMERICHOST)[0][4]
+
+
+def bind_to_device(sock: socket.socket, device: str) -> None:
+    '''
+    Binds sock to the network interface device, so that its packets leave
+    through it whatever the routing table says. Binding needs CAP_NET_RAW;
+    without it, or if device is empty, the routing table picks the
+    interface.
+    '''
+    if (device == ""):
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, device.encode())
+    except OSError:
+        pass
+
+
+def valid_ip(ip: str) -> bool:
+    '''
+    Returns True if ip is an IPv4 or IPv6 address, the latter optionally
+    with a scope, e.g. "fe80::1%eth0". Meant for addresses read from files
+    lanssh does not control the contents of.
+    '''
+    address, _, scope = ip.partition("%")
+    try:
+        parsed = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return ("%" not in ip or (parsed.version == 6 and scope != ""))
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/tcp.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Iterator
+import errno as oserrno
+import selectors
+import socket
+import time
+
+from . import sockutil
+
+SSH_BANNER_PREFIX = b"SSH-"
+BANNER_BUFSIZE = 256
+
+
+def __start_connect(ip: str, port: int, device: str) -> socket.socket:
+    family: int = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    sockutil.bind_to_device(sock, device)
+    try:
+        code: int = sock.connect_ex(sockutil.sockaddr(ip, port))
+    except OSError:
+        sock.close()
+        raise
+    if (code not in (0, oserrno.EINPROGRESS)):
+        sock.close()
+        raise OSError(code, f"connect to {ip}:{port} failed")
+    return sock
+
+
+def __finish(selector: selectors.BaseSelector, pending: dict, sock: socket.socket) -> None:
+    selector.unregister(sock)
+    sock.close()
+    pending.pop(sock)
+
+
+def iter_probe(ips: list, port: int, timeout: float, read_banner: bool = False,
+    devices: dict = {}, max_pending: int = 0) -> Iterator[tuple]:
+    '''
+    Starts a non-blocking TCP connection to port on every address in ips at
+    once and yields an (ip, rtt) tuple as soon as each address accepts the
+    connection, rtt being the time the handshake took in seconds. Every
+    connection has its own timeout. IPv6 addresses are accepted, link-local
+    ones with their scope, e.g. "fe80::1%eth0". If read_banner is True, an
+    address only counts as reachable once it has also sent an SSH
+    identification string within timeout seconds of the handshake. devices
+    optionally maps addresses to the interface their connection is to be
+    bound to. If max_pending is positive, at most that many connections
+    (and file descriptors) are open at a time, and the next address is only
+    tried once one of them is done. Closing the generator early closes all
+    pending connections.
+    '''
+    # socket -> (ip, started_at, deadline, handshake_rtt)
+    pending: dict = {}
+    waiting: list = list(reversed(list(dict.fromkeys(ips))))
+    selector = selectors.DefaultSelector()
+
+    try:
+        while (pending != {} or waiting != []):
+            while (waiting != [] and (max_pending <= 0 or len(pending) < max_pending)):
+                ip: str = waiting.pop()
+                try:
+                    sock: socket.socket = __start_connect(ip, port, devices.get(ip, ""))
+                except OSError:
+                    continue
+                started_at: float = time.monotonic()
+                pending[sock] = (ip, started_at, started_at + timeout, -1.0)
+                selector.register(sock, selectors.EVENT_WRITE)
+
+            now: float = time.monotonic()
+            for sock in [s for s in pending if pending[s][2] <= now]:
+                __finish(selector, pending, sock)
+            if (pending == {}):
+                continue
+
+            remaining: float = min(entry[2] for entry in pending.values()) - now
+            for (key, events) in selector.select(remaining):
+                sock = key.fileobj
+                ip, started_at, deadline, rtt = pending[sock]
+
+                if (events & selectors.EVENT_WRITE):
+                    if (sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0):
+                        __finish(selector, pending, sock)
+                        continue
+
+                    connected_at: float = time.monotonic()
+                    if (not read_banner):
+                        __finish(selector, pending, sock)
+                        yield (ip, connected_at - started_at)
+                        continue
+
+                    pending[sock] = (ip, started_at, connected_at + timeout,
+                        connected_at - started_at)
+                    selector.modify(sock, selectors.EVENT_READ)
+                    continue
+
+                try:
+                    banner: bytes = sock.recv(BANNER_BUFSIZE)
+                except OSError:
+                    banner = b""
+                __finish(selector, pending, sock)
+                if (banner.startswith(SSH_BANNER_PREFIX)):
+                    yield (ip, rtt)
+    finally:
+        for sock in pending:
+            sock.close()
+        selector.close()
+
+
+def probe(ips: list, port: int, timeout: float, read_banner: bool = False,
+    devices: dict = {}, max_pending: int = 0) -> dict:
+    '''
+    Like iter_probe(), but waits for all connections and returns a dictionary
+    mapping every address that accepted one to its handshake time in seconds.
+    '''
+    return dict(iter_probe(ips, port, timeout, read_banner, devices, max_pending))
+
+
+def connect_first(ips: list, port: int, timeout: float) -> str:
+    '''
+    Starts a TCP connection to port on every address in ips at once and
+    returns the first address to accept it, or an empty string if none did
+    within timeout seconds. All other connections are abandoned.
+    '''
+    probes: Iterator[tuple] = iter_probe(ips, port, timeout)
+    try:
+        for (ip, rtt) in probes:
+            return ip
+    finally:
+        probes.close()
+    return ""
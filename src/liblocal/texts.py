@@ -21,6 +21,8 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 
+import json
+
 from .const import *
 
 
@@ -40,12 +42,19 @@ __supported_platforms_section_for_HELP_TEXT() + \
 '''
 #1 Possible usage patterns:
   1. lanssh <alias> [{-u | --user} <host-username>]
+               [{-p | --probe} <probe-type>] [{-nc | --no-cache}]
+               [{-sw | --sweep}] [{-dl | --deadline} <seconds>]
+               [{-tm | --timing}] [{-w | --wait} [<seconds>]]
+               [{-aw | --auto-wake}]
   2. lanssh {-aa | --add-alias} <alias> <mac-address> <default-user>
   3. lanssh {-v | --version}
   4. lanssh {-l | --list} [{-f | --format} <format-type>]
   5. lanssh [{-h | --help}]
   6. lanssh {-ra | --rm-alias} <alias>
   7. lanssh {-rd | --rmdb}
+  8. lanssh {-sc | --scan}
+  9. lanssh {-ls | --listen}
+  10. lanssh {-wk | --wake} <alias>
 
 #2 Meanings of notations used above:
   - <...>       :  A mandatory value for the preceding option. A
@@ -71,6 +80,10 @@ f'''
 
   - <mac-address>    :  The MAC address of the host. Must be a static MAC.
                         It is also case-insensitive as per conventions.
+                        A host with several network interfaces may be given
+                        all their MACs separated by commas without spaces,
+                        e.g. "aa:bb:cc:dd:ee:01,aa:bb:cc:dd:ee:02". Login
+                        then uses whichever interface answers first.
 
   - <host-username>  :  The user to be logged in as to the remote host.
                         Case-sensitive in nature for UNIX compatibility.
@@ -83,6 +96,12 @@ f'''
                         from the database. Case-insensitive for convenience.
                         More about supported formats in section #4 point (5).
 
+  - <probe-type>     :  How the host is checked for reachability before
+                        logging in. Case-insensitive. More about supported
+                        probe types in section #4 point (10).
+
+  - <seconds>        :  A non-negative number of seconds, fractions allowed.
+
 #4 Available options:
   1. -aa, --add-alias  :  Add an alias for the given MAC address. Trying
                           to add an existing alias will result in an error.
@@ -123,7 +142,140 @@ f'''
   9. -rd, --rmdb      :  Clear the database file {DATABASE}. Useful if
                          manual correction of the file becomes impossible.
 
+  10. -p, --probe     :  A non-mandatory option specifying how the host is
+                         checked for reachability. Supported values are:
+                           - icmp   : Send an ICMP echo request (default
+                                      when this option is unspecified).
+                           - arp    : Send an ARP request and make sure the
+                                      reply comes from the host's MAC
+                                      address. Needs CAP_NET_RAW, otherwise
+                                      icmp is used.
+                           - kernel : Ask the kernel to re-check its neighbor
+                                      entry for the host and wait for the
+                                      result. Also checks the MAC address.
+                                      Needs CAP_NET_ADMIN, otherwise icmp is
+                                      used.
+                           - tcp    : Connect to the SSH port ({SSH_PORT}). Useful
+                                      for hosts that drop ICMP.
+                           - ssh    : As with tcp, but also wait for the SSH
+                                      server to send its banner.
+                         See pattern (1) from section #1 for usage.
+
+  11. -nc, --no-cache :  Ignore the last known location of the host stored in
+                         {CACHE} and resolve it from scratch,
+                         waiting the default {PROBE_TIMEOUT:g} second(s) for each probe
+                         instead of the timeout learned from the host's past
+                         round-trip times. Neither lansshd nor DHCP leases
+                         are consulted either. The result still updates the
+                         cache. See pattern (1) from section #1 for usage.
+
+  12. -sw, --sweep    :  If the host is not found in the neighbor table, nudge
+                         every address of the local networks (/{SWEEP_MIN_PREFIX} or smaller)
+                         so the host shows up in it. Bounded to {SWEEP_RATE:g}
+                         packets per second and {SWEEP_TIMEOUT:g} seconds. See pattern (1)
+                         from section #1 for usage.
+
+  13. -sc, --scan     :  Probe the whole neighbor table and list the aliased
+                         hosts that are currently reachable, with their IP
+                         address and round-trip time. Hosts are listed as
+                         they answer. The probe type is taken from the
+                         "probe" setting. See pattern (8) from section #1 for
+                         usage.
+
+  14. -dl, --deadline :  Give up if the host cannot be resolved and connected
+                         to within the given number of seconds. The time is
+                         shared by reading the database, resolving the host
+                         and ssh establishing the connection (rounded up to
+                         whole seconds for ssh). 0 means no deadline. See
+                         pattern (1) from section #1 for usage.
+
+  15. -tm, --timing   :  Before connecting, show how long each resolver took
+                         for each MAC address of the host and whether it
+                         answered, failed, was still running when another
+                         answered (cancelled) or was never started
+                         (skipped). See pattern (1) from section #1 for
+                         usage.
+
+  16. -ls, --listen   :  Listen to the ARP packets and IPv6 neighbor
+                         advertisements on the local networks, without
+                         sending anything, and keep the location of every
+                         aliased host in {CACHE} up to date as
+                         they talk. Logins trust a host heard within the last
+                         {PASSIVE_TRUST_TIME:g} seconds without probing it (for the icmp,
+                         arp and kernel probe types). Runs until interrupted.
+                         Needs CAP_NET_RAW. See pattern (9) from section #1
+                         for usage.
+
+  17. -w, --wait      :  If the host is unreachable, e.g. because it is still
+                         booting, wait for it to come up and connect as soon
+                         as it accepts connections on the SSH port. Changes
+                         to its neighbor entries are watched, and its last
+                         known IP and DHCP leases are probed every
+                         {WAIT_BACKOFF_MIN:g} to {WAIT_BACKOFF_MAX:g} seconds. Waits at most the given
+                         number of seconds, or until interrupted if none (or
+                         0) is given. See pattern (1) from section #1 for
+                         usage.
+
+  18. -wk, --wake     :  Wake the host up with a Wake-on-LAN magic packet and
+                         wait up to {WAKE_TIMEOUT:g} seconds for it to accept
+                         connections on the SSH port, probing it every
+                         {WAKE_BACKOFF_MAX:g} seconds at most. The packet is sent to the
+                         broadcast address of the local IPv4 network the host
+                         was last seen on, or of every local IPv4 network if
+                         that is not known. Shows how long the host took to
+                         answer on the link and to open the SSH port. See
+                         pattern (10) from section #1 for usage.
+
+  19. -aw, --auto-wake:  If the host is unreachable, wake it up as with -wk,
+                         then wait for it as with -w and log in. Waits
+                         {WAKE_TIMEOUT:g} seconds unless -w gives another time. See
+                         pattern (1) from section #1 for usage.
+
 ## NOTE:
+  - Optional settings are read from {CONFIG} (a JSON object).
+    Supported settings, with their defaults, are:
+      - "cache_ttl"          : How long (in seconds) a host found reachable
+                               is first looked for at its cached IP ({CONFIG_DEFAULTS["cache_ttl"]:g}).
+      - "cache_negative_ttl" : How long (in seconds) a host found unreachable
+                               is reported so without checking again ({CONFIG_DEFAULTS["cache_negative_ttl"]:g}).
+      - "sweep"              : Always behave as if -sw were given (false).
+      - "probe"              : The probe type used when -p is not given
+                               ("{CONFIG_DEFAULTS["probe"]}").
+      - "prefer"             : The address family tried first for hosts that
+                               have both IPv4 and IPv6 neighbor entries, one
+                               of "ipv4" or "ipv6" ("{CONFIG_DEFAULTS["prefer"]}").
+      - "interfaces"         : Only look for hosts on these network interfaces,
+                               e.g. ["eth0", "wlan0"] (all interfaces).
+      - "subnets"            : Only look for hosts within these networks, e.g.
+                               ["192.168.1.0/24", "fe80::/10"] (all networks).
+      - "deadline"           : The deadline used when -dl is not given, in
+                               seconds ({CONFIG_DEFAULTS["deadline"]:g}, i.e. none).
+      - "dhcp_leases"        : Lease files of a DHCP server running on this
+                               machine (dnsmasq or ISC dhcpd format). A host
+                               with an unexpired lease is logged into at the
+                               leased IP without probing. Missing files are
+                               skipped (the usual dnsmasq and dhcpd paths).
+      - "resolvers"          : How hosts are looked for, in order of
+                               preference. Resolvers run alongside each
+                               other, and the first one to find the host
+                               wins. Supported values are "daemon" (ask
+                               lansshd, if it is running; the ones after it
+                               give it {DAEMON_HEAD_START:g} seconds to answer),
+                               "leases" (the "dhcp_leases" files), "cache"
+                               (the last known IP in {CACHE}),
+                               "neighbors" (the kernel's neighbor table) and
+                               "sweep" (as with -sw, started {RACE_STAGGER:g} seconds
+                               later or once the ones before it have
+                               failed). Leaving one out disables it
+                               ({json.dumps(CONFIG_DEFAULTS["resolvers"])}).
+      - "auto_wake"          : Always behave as if -aw were given (false).
+      - "dns_port"           : If not 0, lansshd answers DNS queries (A and
+                               AAAA) for "<alias>.<dns_domain>" on
+                               {DNS_ADDRESS} at this port, over UDP and TCP,
+                               with the host's current IP ({CONFIG_DEFAULTS["dns_port"]}, i.e. off).
+      - "dns_domain"         : The domain the aliases are served under
+                               ("{CONFIG_DEFAULTS["dns_domain"]}").
+
   - If the database file gets corrupted, and some options will raise an error.
     In such cases, manual correction must be attempted at first, failing which
     it must be removed.
@@ -142,11 +294,16 @@ f'''
             .
             {
                 "name": "<alias-n>",
-                "mac": "<mac-address-n>",
+                "mac": ["<mac-address-n-1>", "<mac-address-n-2>"],
                 "default_user": "<default-user-n>"
             }
         ]
-    }'''
+    }
+
+    "mac" is a list of strings for hosts with more than one MAC address.
+    An alias entry may also have "resolvers", "interfaces" and "subnets"
+    keys, lists used for that host instead of the settings of the same name,
+    e.g. "subnets": ["192.168.1.0/24"] for a host on the home network only.'''
 
 VERSION_TEXT = \
 f'''lanssh {VERSION}
@@ -158,9 +315,9 @@ This program has absolutely no warranty.'''
 
 MISSING_DEP_TEXT = \
 '''lanssh: A required program was not found on your system.
-Required programs are: ip, ping
-Make sure these packages are installed:
+lanssh could not open an ICMP socket, so the "ping" program is required.
+Either allow your group in net.ipv4.ping_group_range, or make sure this
+package is installed:
     - iputils-ping (on Debian/Ubuntu), or iputils (on Arch/RHEL/Fedora)
-    - iproute2 (on Debian/Ubuntu/Arch), or iproute (on RHEL/Fedora)
 Please note that package name may vary based on your distro repository upstream.'''
 
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+
+# File: ./liblocal/wol.py
+#
+# lanssh - SSH into LAN devices using just an alias for the remote host. No IPs required.
+#
+#
+# Copyright (C) 2025-Present Arijit Kumar Das <arijitkdgit.official@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import socket
+
+# A magic packet is 6 bytes of 0xFF followed by the target MAC 16 times.
+# Network cards look for it anywhere in a frame, so a UDP datagram to the
+# discard port of the broadcast address carries it to every card on the
+# link.
+MAGIC_SYNC = b"\xff" * 6
+MAGIC_REPEAT = 16
+WOL_PORT = 9
+
+
+def magic_packet(mac: str) -> bytes:
+    '''
+    Returns the Wake-on-LAN magic packet for the given MAC address, written
+    as "aa:bb:cc:dd:ee:ff".
+    '''
+    return MAGIC_SYNC + bytes.fromhex(mac.replace(":", "")) * MAGIC_REPEAT
+
+
+def send(macs: list, targets: list, count: int = 1, port: int = WOL_PORT) -> list:
+    '''
+    Sends the magic packet of every MAC address in macs count times to each
+    (broadcast_ip, local_ip) tuple in targets, from local_ip so that it goes
+    out on the interface of that network. Returns the broadcast addresses
+    that at least one packet was sent to.
+    '''
+    packets: list = [magic_packet(mac) for mac in macs]
+    sent_to: list = []
+    for (broadcast_ip, local_ip) in targets:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.bind((local_ip, 0))
+            for _ in range(count):
+                for packet in packets:
+                    sock.sendto(packet, (broadcast_ip, port))
+            sent_to.append(broadcast_ip)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+    return sent_to